@@ -0,0 +1,31 @@
+"""Add composite indexes for graph lookups
+
+Revision ID: 3b9d4e7a1c52
+Revises: 60875d8d58f2
+Create Date: 2026-10-14 09:12:41.228310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9d4e7a1c52'
+down_revision: Union[str, Sequence[str], None] = '60875d8d58f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_version_document_number', 'versions', ['document_id', 'version_number'], unique=False)
+    op.create_index('idx_node_document_version', 'nodes', ['document_id', 'version_id'], unique=False)
+    op.create_index('idx_edge_document_version', 'edges', ['document_id', 'version_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_edge_document_version', table_name='edges')
+    op.drop_index('idx_node_document_version', table_name='nodes')
+    op.drop_index('idx_version_document_number', table_name='versions')
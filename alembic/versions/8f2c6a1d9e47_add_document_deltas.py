@@ -0,0 +1,41 @@
+"""Add document deltas table
+
+Revision ID: 8f2c6a1d9e47
+Revises: 3b9d4e7a1c52
+Create Date: 2026-10-14 18:42:10.513902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2c6a1d9e47'
+down_revision: Union[str, Sequence[str], None] = '3b9d4e7a1c52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_deltas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('document_id', sa.Integer(), nullable=False),
+    sa.Column('version_id', sa.Integer(), nullable=True),
+    sa.Column('text', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['version_id'], ['versions.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_document_deltas_id'), 'document_deltas', ['id'], unique=False)
+    op.create_index('idx_delta_document_id', 'document_deltas', ['document_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_delta_document_id', table_name='document_deltas')
+    op.drop_index(op.f('ix_document_deltas_id'), table_name='document_deltas')
+    op.drop_table('document_deltas')
@@ -0,0 +1,33 @@
+"""Add document content sha256
+
+Revision ID: a1f6d3e8b254
+Revises: e7b2c94f0d61
+Create Date: 2026-10-14 20:11:05.842719
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f6d3e8b254'
+down_revision: Union[str, Sequence[str], None] = 'e7b2c94f0d61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL; the unique index ignores NULLs
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.add_column(sa.Column('content_sha256', sa.String(length=64), nullable=True))
+    op.create_index('idx_document_content_sha256', 'documents', ['content_sha256'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_document_content_sha256', table_name='documents')
+    with op.batch_alter_table('documents') as batch_op:
+        batch_op.drop_column('content_sha256')
@@ -0,0 +1,32 @@
+"""Add version content hash
+
+Revision ID: c4e81b7f2a90
+Revises: 8f2c6a1d9e47
+Create Date: 2026-10-14 18:51:37.660214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e81b7f2a90'
+down_revision: Union[str, Sequence[str], None] = '8f2c6a1d9e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('versions') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index('idx_version_document_hash', 'versions', ['document_id', 'content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_version_document_hash', table_name='versions')
+    with op.batch_alter_table('versions') as batch_op:
+        batch_op.drop_column('content_hash')
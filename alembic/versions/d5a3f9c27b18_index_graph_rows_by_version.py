@@ -0,0 +1,30 @@
+"""Index graph rows by version
+
+Revision ID: d5a3f9c27b18
+Revises: c4e81b7f2a90
+Create Date: 2026-10-14 18:49:02.381755
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a3f9c27b18'
+down_revision: Union[str, Sequence[str], None] = 'c4e81b7f2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Graph reads join nodes/edges on version_id, as do ON DELETE CASCADE from versions
+    op.create_index('idx_node_version_id', 'nodes', ['version_id'], unique=False)
+    op.create_index('idx_edge_version_id', 'edges', ['version_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_edge_version_id', table_name='edges')
+    op.drop_index('idx_node_version_id', table_name='nodes')
@@ -0,0 +1,50 @@
+"""Unique graph rows per version
+
+Revision ID: e7b2c94f0d61
+Revises: d5a3f9c27b18
+Create Date: 2026-10-14 19:32:47.516203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b2c94f0d61'
+down_revision: Union[str, Sequence[str], None] = 'd5a3f9c27b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicates written before uniqueness was enforced, keeping the first row
+    op.execute(
+        "DELETE FROM nodes WHERE id NOT IN ("
+        "SELECT MIN(id) FROM nodes GROUP BY document_id, version_id, node_id)"
+    )
+    op.execute(
+        "DELETE FROM edges WHERE id NOT IN ("
+        "SELECT MIN(id) FROM edges GROUP BY document_id, version_id, source_node_id, target_node_id, relationship_type)"
+    )
+
+    # The unique indexes lead with (document_id, version_id) and replace the plain composites
+    op.drop_index('idx_node_document_version', table_name='nodes')
+    op.drop_index('idx_edge_document_version', table_name='edges')
+    with op.batch_alter_table('nodes') as batch_op:
+        batch_op.create_unique_constraint('uq_node_doc_ver_id', ['document_id', 'version_id', 'node_id'])
+    with op.batch_alter_table('edges') as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_edge_full', ['document_id', 'version_id', 'source_node_id', 'target_node_id', 'relationship_type']
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('edges') as batch_op:
+        batch_op.drop_constraint('uq_edge_full', type_='unique')
+    with op.batch_alter_table('nodes') as batch_op:
+        batch_op.drop_constraint('uq_node_doc_ver_id', type_='unique')
+    op.create_index('idx_edge_document_version', 'edges', ['document_id', 'version_id'], unique=False)
+    op.create_index('idx_node_document_version', 'nodes', ['document_id', 'version_id'], unique=False)
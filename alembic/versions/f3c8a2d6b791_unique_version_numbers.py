@@ -0,0 +1,54 @@
+"""Unique version numbers per document
+
+Revision ID: f3c8a2d6b791
+Revises: a1f6d3e8b254
+Create Date: 2026-10-14 21:04:52.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8a2d6b791'
+down_revision: Union[str, Sequence[str], None] = 'a1f6d3e8b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Racing updates could write the same version number twice. Both versions hold
+    # text the document already includes, so renumber instead of deleting: walking an
+    # affected document's versions in (version_number, id) order, each one that
+    # collides with or falls behind its predecessor moves up to the next number
+    bind = op.get_bind()
+    affected = bind.execute(sa.text(
+        "SELECT document_id FROM versions GROUP BY document_id, version_number HAVING COUNT(*) > 1"
+    )).scalars().all()
+    for document_id in set(affected):
+        versions = bind.execute(
+            sa.text("SELECT id, version_number FROM versions WHERE document_id = :document_id ORDER BY version_number, id"),
+            {"document_id": document_id}
+        ).all()
+        renumbered = []
+        previous = 0
+        for version_id, version_number in versions:
+            if version_number <= previous:
+                version_number = previous + 1
+                renumbered.append({"version_number": version_number, "id": version_id})
+            previous = version_number
+        bind.execute(sa.text("UPDATE versions SET version_number = :version_number WHERE id = :id"), renumbered)
+
+    # Existing content hashes are left as they are: new versions chain from the
+    # latest stored hash, whatever scheme produced it
+    op.drop_index('idx_version_document_number', table_name='versions')
+    op.create_index('idx_version_document_number', 'versions', ['document_id', 'version_number'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_version_document_number', table_name='versions')
+    op.create_index('idx_version_document_number', 'versions', ['document_id', 'version_number'], unique=False)
@@ -1,10 +1,20 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
 
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite:///./knowledge_graph.db"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30  # seconds
+    DB_POOL_PRE_PING: bool = True
+    STATS_CACHE_TTL: int = 30  # seconds, 0 disables caching
+    GRAPH_CACHE_SIZE: int = 1024  # graphs kept in memory, 0 disables caching
+    GRAPH_CACHE_TTL: int = 300  # seconds, applies to latest-version lookups only
+    EXTRACTION_CACHE_SIZE: int = 128  # LLM extraction results kept in memory, 0 disables caching
+    EXTRACTION_CACHE_DIR: Optional[str] = None  # directory persisting LLM extraction results, unset disables
     
     # File Upload
     UPLOAD_DIR: str = "uploads"
@@ -13,24 +23,39 @@ class Settings(BaseSettings):
     # LLM Configuration
     OLLAMA_BASE_URL: str = "http://localhost:11434"
     OLLAMA_MODEL: str = "tinyllama"  # Options: tinyllama, phi, llama3.2
-    OLLAMA_TIMEOUT: int = 120  # seconds
+    OLLAMA_TIMEOUT: int = 40  # seconds for the first attempt; one retry gets 3x this
+    OLLAMA_BATCH_SIZE: int = 4  # texts per request in extract_graph_batch
+    OLLAMA_KEEP_ALIVE: str = "30m"  # how long Ollama keeps the model loaded after a request
     USE_OLLAMA: bool = True  # Set to False to always use fallback extraction
     
     # OpenAI Configuration (Alternative to Ollama)
     USE_OPENAI: bool = False  # Set to True to use OpenAI instead
     OPENAI_API_KEY: Optional[str] = None
-    
-    # Alternative: OpenAI API
-    OPENAI_API_KEY: Optional[str] = None
     OPENAI_MODEL: str = "gpt-3.5-turbo"
+    OPENAI_TIMEOUT: int = 30  # seconds for the first attempt; one retry gets 3x this
+    OPENAI_STRUCTURED_OUTPUT: bool = False  # enforce the graph JSON schema; needs gpt-4o-mini or newer
+    
+    # LLM Input
+    LLM_MAX_INPUT_CHARS: int = 2000  # text sent per extraction prompt; size to the model's context window
+    LLM_MAX_CHUNKS: int = 1  # windows a long text is split into; 1 sends only the first window
+    LLM_CHUNK_OVERLAP: int = 200  # characters shared by consecutive windows
     
     # App Configuration
     APP_NAME: str = "Knowledge Graph Builder"
     DEBUG: bool = True
+    AUTO_CREATE_TABLES: bool = True  # Create missing tables on startup; disable when using Alembic
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        frozen=True  # Settings are read-only after startup
+    )
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """Return the process-wide Settings instance, validated only once"""
+    return Settings()
 
 
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
@@ -1,16 +1,43 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from config import settings
 
+# Dialect-specific engine options
+engine_options = {}
+if settings.DATABASE_URL.startswith(("postgresql://", "postgresql+psycopg2://")):
+    # INSERTs already use insertmanyvalues; this also batches executemany UPDATE/DELETE
+    engine_options.update(executemany_mode="values_plus_batch", executemany_batch_page_size=1000)
+
 # Create engine
 engine = create_engine(
     settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
+    poolclass=QueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    insertmanyvalues_page_size=1000,  # Cap rows per multi-row INSERT for large graphs
+    **engine_options
 )
 
-# Create session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if "sqlite" in settings.DATABASE_URL:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Use WAL so readers don't block on concurrent uploads, and enforce FK cascades"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")  # Durable in WAL mode with one fsync per checkpoint
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")  # 256MB
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+# Create session; sessions live for one request, so keep committed attributes
+# loaded instead of re-SELECTing a row just to build the response
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Base class for models
 Base = declarative_base()
@@ -3,17 +3,72 @@ Database service module for optimized database operations
 Handles batching, transactions, and performance optimizations.
 """
 
-from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from typing import List, Dict, Any, Optional, Tuple
+from fastapi import Depends
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import text, delete, select, func, exists, union_all, literal_column, null, and_
+from collections import OrderedDict
 from contextlib import contextmanager
+from operator import itemgetter
+import csv
+import hashlib
+import io
 import logging
+import threading
+import time
 
-from models import Document, Version, Node, Edge
+from database import get_db
+from models import Document, DocumentDelta, Version, Node, Edge
 from validators import DataValidator
+from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Row count above which PostgreSQL inserts switch from INSERT to COPY
+COPY_THRESHOLD = 500
+
+# Process-wide cache for get_database_stats, shared across sessions
+_stats_cache: Dict[str, Any] = {}
+
+# Process-wide LRU of graphs keyed by (document_id, version_number). A version's
+# graph never changes; the latest-version entry (version_number None) expires
+# after GRAPH_CACHE_TTL so other workers' updates are picked up.
+_graph_cache: "OrderedDict[Tuple[int, Optional[int]], Any]" = OrderedDict()
+_graph_cache_lock = threading.Lock()
+
+# Parameter-free statements built once and shared by every service instance
+DOCUMENT_LIST_QUERY = select(Document.id, Document.filename, Document.file_type, Document.upload_date)
+
+TABLE_COUNTS_QUERY = select(
+    select(func.count()).select_from(Document).scalar_subquery().label('total_documents'),
+    select(func.count()).select_from(Version).scalar_subquery().label('total_versions'),
+    select(func.count()).select_from(Node).scalar_subquery().label('total_nodes'),
+    select(func.count()).select_from(Edge).scalar_subquery().label('total_edges')
+)
+
+
+
+def compute_content_hash(text_content: str) -> str:
+    """Hash text so repeated submissions of the same content can be detected"""
+    return hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+
+
+def compute_version_hash(previous_hash: Optional[str], new_text: str) -> str:
+    """
+    Hash a version's accumulated text without reading it back
+    
+    Chaining the previous version's hash with the added text identifies the
+    whole document as of this version, so the same passage can be appended
+    again later while a replayed update of the same version is still caught.
+    
+    Args:
+        previous_hash: Content hash of the version being extended, or None for the first version
+        new_text: Text this version adds
+    """
+    if previous_hash is None:
+        return compute_content_hash(new_text)
+    return hashlib.sha256(f"{previous_hash}\n{new_text}".encode("utf-8")).hexdigest()
+
 
 class DatabaseService:
     """Service class for optimized database operations"""
@@ -38,7 +93,8 @@ class DatabaseService:
         file_type: str, 
         file_path: str, 
         text_content: str,
-        graph_data: Dict[str, Any]
+        graph_data: Dict[str, Any],
+        content_sha256: Optional[str] = None
     ) -> Document:
         """
         Create a document with its knowledge graph in a single optimized transaction
@@ -49,16 +105,20 @@ class DatabaseService:
             file_path: Path to the file
             text_content: Extracted text content
             graph_data: Validated knowledge graph data
+            content_sha256: SHA-256 of the uploaded file, used to detect re-uploads
             
         Returns:
             Created document object
         """
+        node_rows, edge_rows = self._prepare_graph_rows(graph_data)
+        
         with self.transaction():
             # Create document
             document = Document(
                 filename=filename,
                 file_type=file_type,
                 file_path=file_path,
+                content_sha256=content_sha256,
                 text_content=text_content
             )
             self.db.add(document)
@@ -67,172 +127,482 @@ class DatabaseService:
             # Create version
             version = Version(
                 document_id=document.id,
-                version_number=1
+                version_number=1,
+                content_hash=compute_content_hash(text_content)
             )
             self.db.add(version)
             self.db.flush()  # Get the ID without committing
             
-            # Batch create nodes
-            nodes = self._create_nodes_batch(document.id, version.id, graph_data['nodes'])
-            
-            # Batch create edges
-            edges = self._create_edges_batch(document.id, version.id, graph_data['edges'])
+            # Batch create nodes and edges back to back
+            node_count, edge_count = self._create_graph_batch(document.id, version.id, node_rows, edge_rows)
             
-            logger.info(f"Created document {document.id} with {len(nodes)} nodes and {len(edges)} edges")
-            
-            return document
+            logger.info(f"Created document {document.id} with {node_count} nodes and {edge_count} edges")
+        
+        self.invalidate_stats_cache()
+        return document
     
     def update_document_with_graph(
         self,
         document_id: int,
-        updated_text: str,
-        graph_data: Dict[str, Any]
+        new_text: str,
+        graph_data: Dict[str, Any],
+        base_version: Optional[Tuple[int, Optional[str]]] = None
     ) -> Document:
         """
         Update a document with new knowledge graph in a single optimized transaction
         
+        The added text is stored as a DocumentDelta rather than rewriting the
+        accumulated text_content; use get_document_text for the full text.
+        
         Args:
             document_id: ID of the document to update
-            updated_text: Updated text content
+            new_text: Text added by this update
             graph_data: Validated knowledge graph data
+            base_version: (version number, content hash) the graph was merged onto,
+                as returned by get_document_with_latest_version; defaults to the
+                latest version. If another update got there first, the unique
+                indexes raise IntegrityError instead of silently building on it.
             
         Returns:
             Updated document object
         """
+        node_rows, edge_rows = self._prepare_graph_rows(graph_data)
+        
         with self.transaction():
             # Get document
             document = self.db.query(Document).filter(Document.id == document_id).first()
             if not document:
                 raise ValueError(f"Document {document_id} not found")
             
-            # Update text content
-            document.text_content = updated_text
-            
             # Get next version number
-            latest_version = self.db.query(Version).filter(
-                Version.document_id == document_id
-            ).order_by(Version.version_number.desc()).first()
-            next_version_number = (latest_version.version_number + 1) if latest_version else 1
+            if base_version is None:
+                latest_version = self.db.query(Version).filter(
+                    Version.document_id == document_id
+                ).order_by(Version.version_number.desc()).first()
+                base_version = (
+                    (latest_version.version_number, latest_version.content_hash or '')
+                    if latest_version else (0, None)
+                )
+            next_version_number = base_version[0] + 1
+            previous_hash = base_version[1]
             
-            # Create new version
+            # Create new version; a concurrent update that claimed the same version
+            # number or hash fails the unique indexes at flush
             new_version = Version(
                 document_id=document.id,
-                version_number=next_version_number
+                version_number=next_version_number,
+                content_hash=compute_version_hash(previous_hash, new_text)
             )
             self.db.add(new_version)
             self.db.flush()  # Get the ID without committing
             
-            # Batch create nodes
-            nodes = self._create_nodes_batch(document.id, new_version.id, graph_data['nodes'])
+            # Append only the new text
+            self.db.add(DocumentDelta(document_id=document.id, version_id=new_version.id, text=new_text))
             
-            # Batch create edges
-            edges = self._create_edges_batch(document.id, new_version.id, graph_data['edges'])
+            # Batch create nodes and edges back to back
+            node_count, edge_count = self._create_graph_batch(document.id, new_version.id, node_rows, edge_rows)
             
-            logger.info(f"Updated document {document.id} with version {next_version_number}: {len(nodes)} nodes and {len(edges)} edges")
+            logger.info(f"Updated document {document.id} with version {next_version_number}: {node_count} nodes and {edge_count} edges")
+        
+        self.invalidate_stats_cache()
+        self.invalidate_graph_cache(document_id, latest_only=True)
+        return document
+    
+    def find_document_by_hash(self, content_sha256: str) -> Optional[Document]:
+        """
+        Find a document that was uploaded from identical file content
+        
+        Args:
+            content_sha256: SHA-256 of the uploaded file
             
-            return document
+        Returns:
+            Existing document, or None if the content is new
+        """
+        return self.db.execute(
+            select(Document).where(Document.content_sha256 == content_sha256)
+        ).scalar()
     
-    def _create_nodes_batch(self, document_id: int, version_id: int, nodes_data: List[Dict]) -> List[Node]:
-        """Create multiple nodes in a single batch operation"""
-        nodes = []
+    def get_document_with_latest_version(
+        self,
+        document_id: int
+    ) -> Tuple[Optional[Document], int, Optional[str], Optional[str]]:
+        """
+        Get a document together with its latest version in one query
+        
+        The version before the latest is joined too, so a repeat of the update
+        that created the latest version can be recognised without another query
+        (see repeats_latest_update).
         
-        for node_data in nodes_data:
-            node = Node(
-                document_id=document_id,
-                version_id=version_id,
-                node_id=node_data['id'],
-                label=node_data['label'],
-                node_type=node_data['type']
+        Args:
+            document_id: Document ID
+            
+        Returns:
+            Tuple of (document or None, latest version number or 0, latest content
+            hash to chain an update from or None if there is no version, content
+            hash the latest version was chained from or None if it is the first
+            version or its predecessor was cleaned up)
+        """
+        previous_version = aliased(Version)
+        latest_number = (
+            select(func.max(Version.version_number))
+            .where(Version.document_id == Document.id)
+            .correlate(Document)
+            .scalar_subquery()
+        )
+        row = self.db.execute(
+            select(
+                Document, Version.version_number, Version.content_hash,
+                previous_version.version_number, previous_version.content_hash
             )
-            nodes.append(node)
+            .outerjoin(Version, and_(Version.document_id == Document.id, Version.version_number == latest_number))
+            .outerjoin(previous_version, and_(
+                previous_version.document_id == Document.id,
+                previous_version.version_number == Version.version_number - 1
+            ))
+            .where(Document.id == document_id)
+        ).first()
         
-        # Add all nodes at once
-        self.db.add_all(nodes)
-        self.db.flush()  # Flush to get IDs
+        if not row:
+            return None, 0, None, None
         
-        return nodes
+        document, latest_version_number, latest_hash, previous_number, previous_hash = row
+        if latest_version_number is None:
+            return document, 0, None, None
+        if previous_number is not None:
+            previous_hash = previous_hash or ''
+        return document, latest_version_number, latest_hash or '', previous_hash
     
-    def _create_edges_batch(self, document_id: int, version_id: int, edges_data: List[Dict]) -> List[Edge]:
-        """Create multiple edges in a single batch operation"""
-        edges = []
+    @staticmethod
+    def repeats_latest_update(latest_hash: Optional[str], previous_hash: Optional[str], new_text: str) -> bool:
+        """
+        Check whether new_text is exactly what the latest version added
         
-        for edge_data in edges_data:
-            edge = Edge(
-                document_id=document_id,
-                version_id=version_id,
-                source_node_id=edge_data['source'],
-                target_node_id=edge_data['target'],
-                relationship_type=edge_data['relationship']
+        A client retrying an update that already succeeded sends the same text
+        again; chaining it from the latest version's predecessor reproduces the
+        latest hash. A missing predecessor can only cause a miss, never a false match.
+        
+        Args:
+            latest_hash: Latest content hash, as returned by get_document_with_latest_version
+            previous_hash: Hash the latest version was chained from, as returned there too
+            new_text: Text about to be added
+        """
+        return bool(latest_hash) and compute_version_hash(previous_hash, new_text) == latest_hash
+    
+    def get_version_id(self, document_id: int, version_number: Optional[int] = None) -> Optional[int]:
+        """
+        Get the row id of a document version
+        
+        The row id is the version's primary key, so it identifies a graph on its
+        own; ETags are built from it.
+        
+        Args:
+            document_id: Document ID
+            version_number: Optional specific version number (defaults to latest)
+            
+        Returns:
+            Version row id, or None if there is no such version
+        """
+        query = select(Version.id).where(Version.document_id == document_id)
+        if version_number is not None:
+            query = query.where(Version.version_number == version_number)
+        else:
+            query = query.order_by(Version.version_number.desc()).limit(1)
+        return self.db.execute(query).scalar()
+    
+    def find_version_by_content(self, document_id: int, previous_hash: Optional[str], new_text: str) -> Optional[int]:
+        """
+        Find an existing version with the same accumulated text an update would produce
+        
+        Args:
+            document_id: Document ID
+            previous_hash: Content hash of the version being extended (see get_document_with_latest_version)
+            new_text: Text about to be added
+            
+        Returns:
+            Matching version number, or None if the update is new
+        """
+        return self.db.execute(
+            select(Version.version_number).where(
+                Version.document_id == document_id,
+                Version.content_hash == compute_version_hash(previous_hash, new_text)
             )
-            edges.append(edge)
+        ).scalar()
+    
+    def get_document_text(self, document_id: int) -> Optional[str]:
+        """
+        Get a document's full text: the original content followed by every update
+        
+        Args:
+            document_id: Document ID
+            
+        Returns:
+            Full text, or None if the document doesn't exist
+        """
+        base_text = self.db.execute(
+            select(Document.text_content).where(Document.id == document_id)
+        ).first()
+        if base_text is None:
+            return None
         
-        # Add all edges at once
-        self.db.add_all(edges)
-        self.db.flush()  # Flush to get IDs
+        deltas = self.db.execute(
+            select(DocumentDelta.text)
+            .where(DocumentDelta.document_id == document_id)
+            .order_by(DocumentDelta.id)
+        ).scalars().all()
         
-        return edges
+        return "\n".join([base_text[0] or "", *deltas])
     
-    def get_document_graph_optimized(self, document_id: int, version_id: Optional[int] = None) -> Dict[str, Any]:
+    @staticmethod
+    def _prepare_graph_rows(graph_data: Dict[str, Any]) -> Tuple[List[Tuple[str, str, str]], List[Tuple[str, str, str]]]:
         """
-        Get document graph with optimized queries
+        Flatten validated graph data into deduplicated row tuples once
+        
+        Nodes are deduplicated by ID (first occurrence wins) and edges by
+        (source, target, relationship), preserving input order.
+        
+        Returns:
+            Tuple of (node_rows, edge_rows)
+        """
+        node_fields = itemgetter('id', 'label', 'type')
+        edge_fields = itemgetter('source', 'target', 'relationship')
+        
+        nodes = {}
+        for node_data in graph_data['nodes']:
+            node_row = node_fields(node_data)
+            nodes.setdefault(node_row[0], node_row)
+        
+        edges = dict.fromkeys(edge_fields(edge_data) for edge_data in graph_data['edges'])
+        
+        return list(nodes.values()), list(edges)
+    
+    def _create_graph_batch(
+        self,
+        document_id: int,
+        version_id: int,
+        node_rows: List[Tuple[str, str, str]],
+        edge_rows: List[Tuple[str, str, str]]
+    ) -> Tuple[int, int]:
+        """
+        Insert a version's nodes and edges without an intermediate flush
+        
+        Returns:
+            Tuple of (node_count, edge_count)
+        """
+        node_count = self._create_nodes_batch(document_id, version_id, node_rows)
+        edge_count = self._create_edges_batch(document_id, version_id, edge_rows)
+        return node_count, edge_count
+    
+    def _create_nodes_batch(self, document_id: int, version_id: int, node_rows: List[Tuple[str, str, str]]) -> int:
+        """Create multiple nodes in a single bulk INSERT"""
+        rows = [
+            {
+                'document_id': document_id,
+                'version_id': version_id,
+                'node_id': node_id,
+                'label': label,
+                'node_type': node_type
+            }
+            for node_id, label, node_type in node_rows
+        ]
+        
+        self._bulk_insert(Node, rows)
+        
+        return len(rows)
+    
+    def _create_edges_batch(self, document_id: int, version_id: int, edge_rows: List[Tuple[str, str, str]]) -> int:
+        """Create multiple edges in a single bulk INSERT"""
+        rows = [
+            {
+                'document_id': document_id,
+                'version_id': version_id,
+                'source_node_id': source,
+                'target_node_id': target,
+                'relationship_type': relationship
+            }
+            for source, target, relationship in edge_rows
+        ]
+        
+        self._bulk_insert(Edge, rows)
+        
+        return len(rows)
+    
+    def _bulk_insert(self, model, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insert rows in bulk within the current transaction
+        
+        Large batches on PostgreSQL/psycopg2 are streamed with COPY; everything
+        else goes through the model's Core bulk_insert, which is batched into
+        multi-row INSERTs by insertmanyvalues.
+        """
+        if not rows:
+            return
+        
+        connection = self.db.connection()
+        if len(rows) > COPY_THRESHOLD and connection.dialect.driver == 'psycopg2':
+            columns = list(rows[0])
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows([row[column] for column in columns] for row in rows)
+            buffer.seek(0)
+            
+            cursor = connection.connection.cursor()
+            try:
+                cursor.copy_expert(
+                    f"COPY {model.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            finally:
+                cursor.close()
+        else:
+            model.bulk_insert(self.db, rows)
+    
+    def get_document_graph_optimized(self, document_id: int, version_number: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get document graph, served from the in-process graph cache when possible
+        
+        The returned dict may be shared with other callers and must not be mutated.
         
         Args:
             document_id: Document ID
-            version_id: Optional specific version ID
+            version_number: Optional specific version number (defaults to latest)
             
         Returns:
             Graph data with nodes and edges
         """
-        # Get document
-        document = self.db.query(Document).filter(Document.id == document_id).first()
-        if not document:
-            raise ValueError(f"Document {document_id} not found")
+        return self.get_document_graph_with_version_id(document_id, version_number)[0]
+    
+    def get_document_graph_with_version_id(
+        self,
+        document_id: int,
+        version_number: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Get document graph together with the row id of the version it belongs to
         
-        # Get version
-        if version_id:
-            version = self.db.query(Version).filter(
-                Version.document_id == document_id,
-                Version.id == version_id
-            ).first()
+        The id comes from the same read (or cache entry) as the graph, so ETags
+        can be built without another query.
+        
+        Args:
+            document_id: Document ID
+            version_number: Optional specific version number (defaults to latest)
+            
+        Returns:
+            Tuple of (graph data, version row id); the graph must not be mutated
+        """
+        key = (document_id, version_number)
+        with _graph_cache_lock:
+            cached = _graph_cache.get(key)
+            if cached and (cached[0] is None or cached[0] > time.monotonic()):
+                _graph_cache.move_to_end(key)
+                return cached[1], cached[2]
+        
+        graph, version_id = self._load_document_graph(document_id, version_number)
+        
+        if settings.GRAPH_CACHE_SIZE > 0:
+            with _graph_cache_lock:
+                if version_number is None:
+                    _graph_cache[key] = (time.monotonic() + settings.GRAPH_CACHE_TTL, graph, version_id)
+                    _graph_cache.move_to_end(key)
+                pinned_key = (document_id, graph['version'])
+                _graph_cache[pinned_key] = (None, graph, version_id)
+                _graph_cache.move_to_end(pinned_key)
+                while len(_graph_cache) > settings.GRAPH_CACHE_SIZE:
+                    _graph_cache.popitem(last=False)
+        
+        return graph, version_id
+    
+    @staticmethod
+    def invalidate_graph_cache(document_id: int, latest_only: bool = False) -> None:
+        """
+        Drop cached graphs for a document after a write
+        
+        Args:
+            document_id: Document ID
+            latest_only: Only drop the latest-version entry (pinned versions are still valid)
+        """
+        with _graph_cache_lock:
+            if latest_only:
+                _graph_cache.pop((document_id, None), None)
+                return
+            for key in [key for key in _graph_cache if key[0] == document_id]:
+                del _graph_cache[key]
+    
+    def _load_document_graph(self, document_id: int, version_number: Optional[int] = None) -> Tuple[Dict[str, Any], int]:
+        """
+        Load document graph with a single round-trip
+        
+        The version lookup, nodes and edges are fetched together as one
+        UNION ALL query; a row tagged 'version' is always present when the
+        version exists, so empty graphs are still distinguishable from
+        missing documents. The marker row also carries the version's row id.
+        
+        Args:
+            document_id: Document ID
+            version_number: Optional specific version number (defaults to latest)
+            
+        Returns:
+            Tuple of (graph data with nodes and edges, version row id)
+        """
+        # Resolve the target version as a subquery
+        version_query = select(Version.id, Version.version_number).where(
+            Version.document_id == document_id
+        )
+        if version_number is not None:
+            version_query = version_query.where(Version.version_number == version_number)
         else:
-            version = self.db.query(Version).filter(
-                Version.document_id == document_id
-            ).order_by(Version.version_number.desc()).first()
+            version_query = version_query.order_by(Version.version_number.desc()).limit(1)
+        target_version = version_query.subquery()
         
-        if not version:
-            raise ValueError(f"No version found for document {document_id}")
+        # Fetch version marker, nodes and edges in one query
+        graph_query = union_all(
+            select(
+                literal_column("'version'").label('kind'),
+                target_version.c.version_number,
+                null(), null(), null(),
+                target_version.c.id
+            ),
+            select(
+                literal_column("'node'"),
+                target_version.c.version_number,
+                Node.node_id, Node.label, Node.node_type,
+                null()
+            ).join(target_version, Node.version_id == target_version.c.id),
+            select(
+                literal_column("'edge'"),
+                target_version.c.version_number,
+                Edge.source_node_id, Edge.target_node_id, Edge.relationship_type,
+                null()
+            ).join(target_version, Edge.version_id == target_version.c.id)
+        )
+        # Stream plain row tuples in chunks instead of buffering the full result
+        rows = self.db.execute(graph_query.execution_options(yield_per=1000))
         
-        # Get nodes and edges in single queries
-        nodes = self.db.query(Node).filter(
-            Node.document_id == document_id,
-            Node.version_id == version.id
-        ).all()
+        found_version = None
+        version_id = None
+        nodes = []
+        edges = []
+        for kind, row_version, first, second, third, row_version_id in rows:
+            found_version = row_version
+            if kind == 'version':
+                version_id = row_version_id
+            elif kind == 'node':
+                nodes.append({'id': first, 'label': second, 'type': third})
+            elif kind == 'edge':
+                edges.append({'source': first, 'target': second, 'relationship': third})
         
-        edges = self.db.query(Edge).filter(
-            Edge.document_id == document_id,
-            Edge.version_id == version.id
-        ).all()
+        if found_version is None:
+            # Only the miss path pays for telling the two cases apart
+            if not self.document_exists(document_id):
+                raise ValueError(f"Document {document_id} not found")
+            if version_number is not None:
+                raise ValueError(f"Version {version_number} not found for document {document_id}")
+            raise ValueError(f"No version found for document {document_id}")
         
         return {
             'document_id': str(document_id),
-            'version': version.version_number,
-            'nodes': [
-                {
-                    'id': node.node_id,
-                    'label': node.label,
-                    'type': node.node_type
-                }
-                for node in nodes
-            ],
-            'edges': [
-                {
-                    'source': edge.source_node_id,
-                    'target': edge.target_node_id,
-                    'relationship': edge.relationship_type
-                }
-                for edge in edges
-            ]
-        }
+            'version': found_version,
+            'nodes': nodes,
+            'edges': edges
+        }, version_id
     
     def get_document_versions_optimized(self, document_id: int) -> List[Dict[str, Any]]:
         """
@@ -244,10 +614,15 @@ class DatabaseService:
         Returns:
             List of version information
         """
-        # Single query to get all versions
-        versions = self.db.query(Version).filter(
-            Version.document_id == document_id
-        ).order_by(Version.version_number.desc()).all()
+        # Single query returning row tuples rather than Version instances
+        versions = self.db.execute(
+            select(Version.version_number, Version.created_at)
+            .where(Version.document_id == document_id)
+            .order_by(Version.version_number.desc())
+        ).all()
+        
+        if not versions and not self.document_exists(document_id):
+            raise ValueError(f"Document {document_id} not found")
         
         return [
             {
@@ -257,6 +632,18 @@ class DatabaseService:
             for version in versions
         ]
     
+    def document_exists(self, document_id: int) -> bool:
+        """
+        Check whether a document exists without loading it
+        
+        Args:
+            document_id: Document ID
+            
+        Returns:
+            True if the document exists
+        """
+        return self.db.execute(select(exists().where(Document.id == document_id))).scalar()
+    
     def get_documents_optimized(self) -> List[Dict[str, Any]]:
         """
         Get all documents with optimized query
@@ -264,7 +651,8 @@ class DatabaseService:
         Returns:
             List of document information
         """
-        documents = self.db.query(Document).all()
+        # Select listing columns only; text_content can be very large
+        documents = self.db.execute(DOCUMENT_LIST_QUERY).all()
         
         return [
             {
@@ -272,7 +660,8 @@ class DatabaseService:
                 'filename': doc.filename,
                 'file_type': doc.file_type,
                 'upload_date': doc.upload_date,
-                'status': 'success'
+                'status': 'success',
+                'message': None
             }
             for doc in documents
         ]
@@ -289,48 +678,51 @@ class DatabaseService:
             Number of versions deleted
         """
         with self.transaction():
-            # Get versions to delete (oldest first)
-            versions_to_delete = self.db.query(Version).filter(
+            # Everything past the newest keep_versions versions
+            stale_versions = select(Version.id).where(
                 Version.document_id == document_id
-            ).order_by(Version.version_number.asc()).offset(keep_versions).all()
-            
-            if not versions_to_delete:
-                return 0
+            ).order_by(Version.version_number.desc()).offset(keep_versions)
             
-            version_ids = [v.id for v in versions_to_delete]
+            # Single DELETE; nodes and edges go with them via ON DELETE CASCADE
+            deleted_count = self.db.execute(
+                delete(Version)
+                .where(Version.id.in_(stale_versions))
+                .execution_options(synchronize_session=False)
+            ).rowcount
             
-            # Delete associated nodes and edges first (cascade should handle this, but being explicit)
-            self.db.query(Node).filter(Node.version_id.in_(version_ids)).delete(synchronize_session=False)
-            self.db.query(Edge).filter(Edge.version_id.in_(version_ids)).delete(synchronize_session=False)
-            
-            # Delete versions
-            deleted_count = self.db.query(Version).filter(
-                Version.id.in_(version_ids)
-            ).delete(synchronize_session=False)
+            if not deleted_count:
+                return 0
             
             logger.info(f"Cleaned up {deleted_count} old versions for document {document_id}")
-            return deleted_count
+        
+        self.invalidate_stats_cache()
+        self.invalidate_graph_cache(document_id)
+        return deleted_count
+    
+    @staticmethod
+    def invalidate_stats_cache() -> None:
+        """Drop cached statistics after a write"""
+        _stats_cache.clear()
     
     def get_database_stats(self) -> Dict[str, Any]:
         """
         Get database statistics for monitoring
         
+        Results are cached for STATS_CACHE_TTL seconds and invalidated
+        whenever documents or versions are written.
+        
         Returns:
             Dictionary with database statistics
         """
-        stats = {}
-        
-        # Count documents
-        stats['total_documents'] = self.db.query(Document).count()
+        cached = _stats_cache.get('stats')
+        if cached and cached[0] > time.monotonic():
+            return dict(cached[1])
         
-        # Count versions
-        stats['total_versions'] = self.db.query(Version).count()
-        
-        # Count nodes
-        stats['total_nodes'] = self.db.query(Node).count()
+        stats = {}
         
-        # Count edges
-        stats['total_edges'] = self.db.query(Edge).count()
+        # Count all tables in a single round-trip
+        counts = self.db.execute(TABLE_COUNTS_QUERY).one()
+        stats.update(counts._asdict())
         
         # Average nodes per document
         if stats['total_documents'] > 0:
@@ -344,4 +736,14 @@ class DatabaseService:
         else:
             stats['avg_edges_per_document'] = 0
         
-        return stats
\ No newline at end of file
+        if settings.STATS_CACHE_TTL > 0:
+            _stats_cache['stats'] = (time.monotonic() + settings.STATS_CACHE_TTL, stats)
+        
+        return dict(stats)
+
+
+def get_db_service(db: Session = Depends(get_db)) -> DatabaseService:
+    """
+    Dependency providing a DatabaseService bound to the request's session
+    """
+    return DatabaseService(db)
@@ -3,12 +3,18 @@
 Demo script to test the Knowledge Graph Builder API
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 from pathlib import Path
 
 BASE_URL = "http://localhost:8000"
 
+# Reuse one keep-alive connection pool for every demo request
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
 
 def print_section(title):
     """Print a section header"""
@@ -44,7 +50,7 @@ def upload_document(filename):
     
     with open(filename, 'rb') as f:
         files = {'file': (filename, f, 'text/plain')}
-        response = requests.post(f"{BASE_URL}/documents/upload", files=files)
+        response = session.post(f"{BASE_URL}/documents/upload", files=files)
     
     if response.status_code == 200:
         data = response.json()
@@ -63,7 +69,7 @@ def list_documents():
     """List all documents"""
     print_section("2. Listing All Documents")
     
-    response = requests.get(f"{BASE_URL}/documents")
+    response = session.get(f"{BASE_URL}/documents")
     
     if response.status_code == 200:
         documents = response.json()
@@ -82,7 +88,7 @@ def get_knowledge_graph(document_id):
     """Get the knowledge graph for a document"""
     print_section("3. Retrieving Knowledge Graph")
     
-    response = requests.get(f"{BASE_URL}/documents/{document_id}/graph")
+    response = session.get(f"{BASE_URL}/documents/{document_id}/graph")
     
     if response.status_code == 200:
         graph = response.json()
@@ -111,7 +117,7 @@ def list_versions(document_id):
     """List all versions of a document's graph"""
     print_section("4. Listing Graph Versions")
     
-    response = requests.get(f"{BASE_URL}/documents/{document_id}/versions")
+    response = session.get(f"{BASE_URL}/documents/{document_id}/versions")
     
     if response.status_code == 200:
         data = response.json()
@@ -128,7 +134,7 @@ def get_specific_version(document_id, version_number):
     """Get a specific version of the graph"""
     print_section(f"5. Retrieving Version {version_number}")
     
-    response = requests.get(
+    response = session.get(
         f"{BASE_URL}/documents/{document_id}/versions/{version_number}"
     )
     
@@ -146,7 +152,7 @@ def check_api_health():
     print_section("Checking API Health")
     
     try:
-        response = requests.get(BASE_URL, timeout=5)
+        response = session.get(BASE_URL, timeout=5)
         if response.status_code == 200:
             print("✓ API is running!")
             data = response.json()
@@ -3,17 +3,32 @@ Error handling module for AI-Powered Knowledge Graph Builder
 Provides centralized error handling, logging, and user-friendly error responses.
 """
 
+import itertools
 import logging
 import traceback
+import uuid
 from typing import Dict, Any, Optional
 from fastapi import HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse as JSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from pydantic import ValidationError
 
+from config import settings
+
 logger = logging.getLogger(__name__)
 
+# Captured once so exception handlers don't go through the settings model
+_DEBUG = settings.DEBUG
+
+# Error IDs are a per-process random prefix plus a monotonically increasing counter
+_ERROR_ID_PREFIX = uuid.uuid4().hex[:8]
+_error_counter = itertools.count(1)
+
+# PostgreSQL SQLSTATE codes for integrity violations
+PG_UNIQUE_VIOLATION = "23505"
+PG_FOREIGN_KEY_VIOLATION = "23503"
+
 
 class APIError(Exception):
     """Base exception for API errors"""
@@ -92,9 +107,14 @@ class ErrorHandler:
         error_type = type(exc).__name__
         
         if isinstance(exc, IntegrityError):
+            # Inspect the DBAPI error once; str(exc) re-renders the statement and parameters
+            orig = getattr(exc, "orig", None) or exc
+            orig_message = str(orig)
+            pgcode = getattr(orig, "pgcode", None)
+            
             # Handle constraint violations
-            if "UNIQUE constraint failed" in str(exc):
-                logger.warning(f"Unique constraint violation: {exc}")
+            if pgcode == PG_UNIQUE_VIOLATION or (pgcode is None and "UNIQUE constraint failed" in orig_message):
+                logger.warning(f"Unique constraint violation: {orig_message}")
                 return JSONResponse(
                     status_code=409,
                     content={
@@ -103,8 +123,8 @@ class ErrorHandler:
                         "details": {"constraint": "unique"}
                     }
                 )
-            elif "FOREIGN KEY constraint failed" in str(exc):
-                logger.warning(f"Foreign key constraint violation: {exc}")
+            elif pgcode == PG_FOREIGN_KEY_VIOLATION or (pgcode is None and "FOREIGN KEY constraint failed" in orig_message):
+                logger.warning(f"Foreign key constraint violation: {orig_message}")
                 return JSONResponse(
                     status_code=400,
                     content={
@@ -114,7 +134,7 @@ class ErrorHandler:
                     }
                 )
             else:
-                logger.error(f"Integrity error: {exc}")
+                logger.error(f"Integrity error: {orig_message}")
                 return JSONResponse(
                     status_code=400,
                     content={
@@ -151,10 +171,14 @@ class ErrorHandler:
     @staticmethod
     def handle_generic_error(exc: Exception) -> JSONResponse:
         """Handle unexpected errors"""
-        error_id = id(exc)  # Simple error ID for tracking
+        error_id = f"{_ERROR_ID_PREFIX}-{next(_error_counter)}"  # Unique error ID for tracking
         
         logger.error(f"Unexpected error (ID: {error_id}): {exc}")
-        logger.error(f"Traceback: {traceback.format_exc()}")
+        
+        # Formatting the traceback is costly; only do it when it will be useful
+        if _DEBUG or logger.isEnabledFor(logging.DEBUG):
+            tb = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
+            logger.error(f"Traceback: {tb}")
         
         return JSONResponse(
             status_code=500,
@@ -162,7 +186,7 @@ class ErrorHandler:
                 "error": "Internal Server Error",
                 "message": "An unexpected error occurred",
                 "details": {
-                    "error_id": str(error_id),
+                    "error_id": error_id,
                     "type": type(exc).__name__
                 }
             }
@@ -211,6 +235,36 @@ def create_error_response(
     )
 
 
+# Headers that must never be written to logs
+SENSITIVE_HEADERS = frozenset({"authorization", "proxy-authorization", "cookie", "set-cookie", "x-api-key"})
+
+
+class _ErrorContext:
+    """Request error context that is only built when the log record is formatted"""
+    
+    __slots__ = ("request", "error", "context")
+    
+    def __init__(self, request: Request, error: Exception, context: Dict[str, Any]):
+        self.request = request
+        self.error = error
+        self.context = context
+    
+    def __str__(self) -> str:
+        request = self.request
+        return str({
+            "method": request.method,
+            "url": str(request.url),
+            "headers": {
+                name: value for name, value in request.headers.items()
+                if name not in SENSITIVE_HEADERS
+            },
+            "client": request.client.host if request.client else "unknown",
+            "error_type": type(self.error).__name__,
+            "error_message": str(self.error),
+            "context": self.context
+        })
+
+
 def log_error_context(request: Request, error: Exception, context: Dict[str, Any] = None):
     """
     Log error with request context
@@ -220,19 +274,10 @@ def log_error_context(request: Request, error: Exception, context: Dict[str, Any
         error: The exception that occurred
         context: Additional context information
     """
-    context = context or {}
-    
-    error_context = {
-        "method": request.method,
-        "url": str(request.url),
-        "headers": dict(request.headers),
-        "client": request.client.host if request.client else "unknown",
-        "error_type": type(error).__name__,
-        "error_message": str(error),
-        "context": context
-    }
+    if not logger.isEnabledFor(logging.ERROR):
+        return
     
-    logger.error(f"Request error context: {error_context}")
+    logger.error("Request error context: %s", _ErrorContext(request, error, context or {}))
 
 
 class ErrorMiddleware:
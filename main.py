@@ -1,35 +1,44 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Request, Query
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.exceptions import RequestValidationError
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from typing import List, Optional
 import uvicorn
+import asyncio
 from datetime import datetime
 import os
+import hashlib
+import tempfile
+import aiofiles
+import orjson
 
-from database import get_db, engine, Base
-from models import Document, Node, Edge, Version
+from database import engine, Base
+from models import Document, Node, Edge
 from schemas import DocumentResponse, GraphResponse, VersionListResponse
 from services import DocumentProcessor, KnowledgeGraphExtractor
 from config import settings
 from fastapi import Form
 from validators import validate_file_upload, validate_knowledge_graph_response, APIValidator
-from database_service import DatabaseService
+from database_service import DatabaseService, get_db_service
 from security import SecurityManager
 from error_handlers import (
     ErrorHandler, APIError, ValidationError as CustomValidationError, 
     NotFoundError, ProcessingError, SecurityError, create_error_response
 )
-# Create tables
-Base.metadata.create_all(bind=engine)
-
 app = FastAPI(
     title="AI-Powered Knowledge Graph Builder",
     description="Extract entities and relationships from documents using AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+@app.on_event("startup")
+def create_tables():
+    # Schema is managed by Alembic (migrate.py) in production; this is a dev convenience
+    if settings.AUTO_CREATE_TABLES:
+        Base.metadata.create_all(bind=engine)
+
 # Add error handlers
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -62,6 +71,74 @@ except OSError as e:
 doc_processor = DocumentProcessor()
 kg_extractor = KnowledgeGraphExtractor()
 
+@app.on_event("startup")
+async def warm_ollama_model():
+    # Load the model in the background so startup isn't held up and the first upload doesn't pay for it
+    if settings.USE_OLLAMA:
+        asyncio.get_running_loop().run_in_executor(None, kg_extractor.warm_up)
+
+# Read uploads in 1MB chunks so large files never sit fully in memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+async def save_upload_file(file: UploadFile, file_path: str) -> str:
+    """
+    Stream an uploaded file to disk without blocking the event loop
+    
+    Returns:
+        SHA-256 of the content, computed in the same pass as the write
+    """
+    digest = hashlib.sha256()
+    async with aiofiles.open(file_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            await f.write(chunk)
+    return digest.hexdigest()
+
+
+def duplicate_upload_response(document: Document) -> DocumentResponse:
+    """Response for an upload whose content matches an existing document"""
+    return DocumentResponse.model_construct(
+        id=document.id,
+        filename=document.filename,
+        file_type=document.file_type,
+        upload_date=document.upload_date,
+        status="success",
+        message=f"Document already uploaded as document {document.id}; reusing its knowledge graph"
+    )
+
+
+def unchanged_update_response(document: Document, version_number: int) -> DocumentResponse:
+    """Response for an update whose text an existing version already added"""
+    return DocumentResponse.model_construct(
+        id=document.id,
+        filename=document.filename,
+        file_type=document.file_type,
+        upload_date=document.upload_date,
+        status="success",
+        message=f"Document unchanged; version {version_number} already contains this text"
+    )
+
+
+# A version's graph never changes, so historical versions can be cached indefinitely
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "max-age=0, must-revalidate"
+
+
+def graph_etag(document_id: int, version_id: int) -> str:
+    """ETag identifying the graph of one document version, keyed on the version's row id"""
+    digest = hashlib.blake2b(f"{document_id}:{version_id}".encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match header already covers this ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
 
 @app.get("/")
 async def root():
@@ -81,7 +158,7 @@ async def root():
 @app.post("/documents/upload", response_model=DocumentResponse)
 async def upload_document(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db_service: DatabaseService = Depends(get_db_service)
 ):
     """
     Upload a document (PDF, DOCX, TXT, CSV) and extract knowledge graph
@@ -89,36 +166,49 @@ async def upload_document(
     # Validate file upload
     safe_filename, file_ext = validate_file_upload(file, file.filename)
     
+    # Stream to a temporary file first; it only takes its stored name once a new
+    # document is stored, so a duplicate never touches an existing document's file.
+    # The stored name carries a random suffix, so uploads that share a filename
+    # but not their bytes never clash on the unique file_path.
+    file_path = os.path.join(settings.UPLOAD_DIR, SecurityManager.generate_safe_filename(safe_filename))
+    with tempfile.NamedTemporaryFile(dir=settings.UPLOAD_DIR, prefix="upload_", suffix=file_ext, delete=False) as tmp:
+        tmp_path = tmp.name
+    
     try:
-        # Save file with safe filename
-        file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        content_sha256 = await save_upload_file(file, tmp_path)
+        
+        # Same bytes were uploaded before: hand back that document instead of
+        # running extraction again
+        existing = await run_in_threadpool(db_service.find_document_by_hash, content_sha256)
+        if existing is not None:
+            os.remove(tmp_path)
+            return duplicate_upload_response(existing)
         
         # Extract text content
-        text_content = doc_processor.extract_text(file_path, file_ext)
+        text_content = await run_in_threadpool(doc_processor.extract_text, tmp_path, file_ext)
         
         # Validate text content
         text_content = APIValidator.validate_text_content(text_content)
         
         # Extract knowledge graph
-        raw_graph_data = kg_extractor.extract_graph(text_content)
+        raw_graph_data = await run_in_threadpool(kg_extractor.extract_graph, text_content)
         
         # Validate knowledge graph response
-        graph_data = validate_knowledge_graph_response(str(raw_graph_data))
+        graph_data = validate_knowledge_graph_response(orjson.dumps(raw_graph_data).decode())
         
         # Create document with graph using optimized service
-        db_service = DatabaseService(db)
-        document = db_service.create_document_with_graph(
+        document = await run_in_threadpool(
+            db_service.create_document_with_graph,
             filename=safe_filename,
             file_type=file_ext[1:],  # Remove the dot
             file_path=file_path,
             text_content=text_content,
-            graph_data=graph_data
+            graph_data=graph_data,
+            content_sha256=content_sha256
         )
+        os.replace(tmp_path, file_path)
         
-        return DocumentResponse(
+        return DocumentResponse.model_construct(
             id=document.id,
             filename=document.filename,
             file_type=document.file_type,
@@ -127,33 +217,35 @@ async def upload_document(
             message="Document processed and knowledge graph extracted"
         )
         
+    except IntegrityError:
+        # A concurrent upload of the same content committed first
+        await run_in_threadpool(db_service.db.rollback)
+        os.remove(tmp_path)
+        existing = await run_in_threadpool(db_service.find_document_by_hash, content_sha256)
+        if existing is None:
+            raise HTTPException(status_code=500, detail="Error processing document: conflicting document record")
+        return duplicate_upload_response(existing)
+        
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db_service.db.rollback)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         raise HTTPException(status_code=500, detail=f"Error processing document: {str(e)}")
 
 
 @app.get("/documents", response_model=List[DocumentResponse])
-async def list_documents(db: Session = Depends(get_db)):
+def list_documents(db_service: DatabaseService = Depends(get_db_service)):
     """
     List all uploaded documents
     """
-    db_service = DatabaseService(db)
     documents_data = db_service.get_documents_optimized()
     
-    return [
-        DocumentResponse(
-            id=doc['id'],
-            filename=doc['filename'],
-            file_type=doc['file_type'],
-            upload_date=doc['upload_date'],
-            status=doc['status']
-        )
-        for doc in documents_data
-    ]
+    # Rows come straight from our own tables, so skip response model validation
+    return ORJSONResponse(documents_data)
 
 
 @app.get("/documents/{document_id}/graph", response_model=GraphResponse)
-async def get_graph(document_id: int, db: Session = Depends(get_db)):
+def get_graph(document_id: int, request: Request, db_service: DatabaseService = Depends(get_db_service)):
     """
     Get the latest knowledge graph for a document
     """
@@ -163,22 +255,28 @@ async def get_graph(document_id: int, db: Session = Depends(get_db)):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+    # Revalidation only needs the latest version's id, not the graph
+    if request.headers.get("if-none-match"):
+        latest_version_id = db_service.get_version_id(document_id)
+        if latest_version_id is not None:
+            etag = graph_etag(document_id, latest_version_id)
+            if etag_matches(request, etag):
+                return Response(status_code=304, headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL})
+    
     try:
-        db_service = DatabaseService(db)
-        graph_data = db_service.get_document_graph_optimized(document_id)
-        
-        return GraphResponse(
-            document_id=graph_data['document_id'],
-            version=graph_data['version'],
-            nodes=graph_data['nodes'],
-            edges=graph_data['edges']
-        )
+        graph_data, version_id = db_service.get_document_graph_with_version_id(document_id)
+
+        # Already shaped like GraphResponse; serialize without re-validating every node and edge
+        return ORJSONResponse(graph_data, headers={
+            "ETag": graph_etag(document_id, version_id),
+            "Cache-Control": REVALIDATE_CACHE_CONTROL
+        })
     except ValueError as e:
         raise NotFoundError(f"Document {document_id} not found")
 
 
 @app.get("/documents/{document_id}/versions", response_model=VersionListResponse)
-async def list_versions(document_id: int, db: Session = Depends(get_db)):
+def list_versions(document_id: int, db_service: DatabaseService = Depends(get_db_service)):
     """
     List all versions for a document
     """
@@ -189,13 +287,12 @@ async def list_versions(document_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail=str(e))
     
     try:
-        db_service = DatabaseService(db)
         versions_data = db_service.get_document_versions_optimized(document_id)
         
-        return VersionListResponse(
-            document_id=document_id,
-            versions=versions_data
-        )
+        return ORJSONResponse({
+            "document_id": document_id,
+            "versions": versions_data
+        })
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -204,11 +301,16 @@ async def update_document(
     document_id: int,
     new_text: Optional[str] = Form(None),
     file: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db_service: DatabaseService = Depends(get_db_service)
 ):
     """
     Update an existing document by adding new text or uploading a new version.
     Creates a new version of the knowledge graph.
+    
+    Versions are identified by their accumulated text, so appending a passage
+    that is already in the document still creates a new version. Sending the
+    text that the latest version added again (for example after a timeout) is
+    answered as unchanged, as is an identical update racing this one.
     """
     # Validate document ID
     try:
@@ -216,23 +318,19 @@ async def update_document(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
-    # Fetch existing document
-    document = db.query(Document).filter(Document.id == document_id).first()
+    # Fetch existing document and its latest version off the event loop
+    document, latest_version_number, latest_hash, previous_hash = await run_in_threadpool(
+        db_service.get_document_with_latest_version, document_id
+    )
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
-
-    # Get latest version number
-    latest_version = db.query(Version).filter(
-        Version.document_id == document_id
-    ).order_by(Version.version_number.desc()).first()
-    next_version_number = (latest_version.version_number + 1) if latest_version else 1
+    next_version_number = latest_version_number + 1
 
     # Case 1: Update via new text
     if new_text:
         # Validate text content
         try:
             validated_text = APIValidator.validate_text_content(new_text)
-            updated_text = document.text_content + "\n" + validated_text
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     
@@ -242,40 +340,68 @@ async def update_document(
         try:
             safe_filename, file_ext = validate_file_upload(file, file.filename)
             
-            file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
-            with open(file_path, "wb") as f:
-                content = await file.read()
-                f.write(content)
+            # Never overwrite a stored upload that happens to share the filename
+            file_path = os.path.join(settings.UPLOAD_DIR, SecurityManager.generate_safe_filename(safe_filename))
+            await save_upload_file(file, file_path)
 
-            new_text_content = doc_processor.extract_text(file_path, file_ext)
+            new_text_content = await run_in_threadpool(doc_processor.extract_text, file_path, file_ext)
             validated_text = APIValidator.validate_text_content(new_text_content)
-            updated_text = document.text_content + "\n" + validated_text
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     else:
         raise HTTPException(status_code=400, detail="Provide either new_text or a file for update")
 
-    # Extract new graph
-    raw_graph_data = kg_extractor.extract_graph(updated_text)
+    # The latest version was created by this same update: skip extraction and
+    # don't write a new version
+    if db_service.repeats_latest_update(latest_hash, previous_hash, validated_text):
+        return unchanged_update_response(document, latest_version_number)
+
+    # Extract a graph from the added text only and merge it into the latest one,
+    # instead of re-processing the whole accumulated document. The previous graph
+    # is loaded while extraction runs; only this task touches the session. It is
+    # read by version number, so it is exactly the version this update extends
+    # rather than a possibly stale cached "latest" entry.
+    extraction = run_in_threadpool(kg_extractor.extract_graph, validated_text)
+    if latest_version_number:
+        previous_graph, new_graph_data = await asyncio.gather(
+            run_in_threadpool(db_service.get_document_graph_optimized, document_id, latest_version_number),
+            extraction
+        )
+    else:
+        previous_graph, new_graph_data = {"nodes": [], "edges": []}, await extraction
+    raw_graph_data = kg_extractor.merge_graphs(previous_graph, new_graph_data)
     
-    # Validate knowledge graph response
+    # Validate knowledge graph response; every merged graph is new, so don't cache it
     try:
-        graph_data = validate_knowledge_graph_response(str(raw_graph_data))
+        graph_data = validate_knowledge_graph_response(orjson.dumps(raw_graph_data).decode(), use_cache=False)
     except Exception as e:
         raise HTTPException(status_code=422, detail=str(e))
 
     # Update document with graph using optimized service
     try:
-        db_service = DatabaseService(db)
-        document = db_service.update_document_with_graph(
+        document = await run_in_threadpool(
+            db_service.update_document_with_graph,
             document_id=document_id,
-            updated_text=updated_text,
-            graph_data=graph_data
+            new_text=validated_text,
+            graph_data=graph_data,
+            base_version=(latest_version_number, latest_hash)
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except IntegrityError:
+        # A concurrent update committed first: either this same update, or a
+        # different one that took the next version number
+        await run_in_threadpool(db_service.db.rollback)
+        existing_version = await run_in_threadpool(
+            db_service.find_version_by_content, document_id, latest_hash, validated_text
+        )
+        if existing_version is None:
+            raise HTTPException(status_code=409, detail="Document was updated concurrently; retry the update")
+        # The rollback expired the loaded document; reload it off the event loop
+        await run_in_threadpool(db_service.db.refresh, document)
+        return unchanged_update_response(document, existing_version)
 
-    return DocumentResponse(
+    return DocumentResponse.model_construct(
         id=document.id,
         filename=document.filename,
         file_type=document.file_type,
@@ -286,10 +412,11 @@ async def update_document(
 
 
 @app.get("/documents/{document_id}/versions/{version_number}", response_model=GraphResponse)
-async def get_version(
+def get_version(
     document_id: int,
     version_number: int,
-    db: Session = Depends(get_db)
+    request: Request,
+    db_service: DatabaseService = Depends(get_db_service)
 ):
     """
     Get a specific version of the knowledge graph
@@ -301,27 +428,32 @@ async def get_version(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+    # A version row's graph never changes; a matching ETag only costs the id lookup
+    version_id = db_service.get_version_id(document_id, version_number)
+    if version_id is None:
+        if not db_service.document_exists(document_id):
+            raise HTTPException(status_code=404, detail=f"Document {document_id} not found")
+        raise HTTPException(status_code=404, detail=f"Version {version_number} not found for document {document_id}")
+    
+    etag = graph_etag(document_id, version_id)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL})
+    
     try:
-        db_service = DatabaseService(db)
-        graph_data = db_service.get_document_graph_optimized(document_id, version_id)
+        graph_data = db_service.get_document_graph_optimized(document_id, version_number)
         
-        return GraphResponse(
-            document_id=graph_data['document_id'],
-            version=graph_data['version'],
-            nodes=graph_data['nodes'],
-            edges=graph_data['edges']
-        )
+        # Already shaped like GraphResponse; serialize without re-validating every node and edge
+        return ORJSONResponse(graph_data, headers={"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL})
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @app.get("/stats")
-async def get_database_stats(db: Session = Depends(get_db)):
+def get_database_stats(db_service: DatabaseService = Depends(get_db_service)):
     """
     Get database statistics for monitoring
     """
     try:
-        db_service = DatabaseService(db)
         stats = db_service.get_database_stats()
         return stats
     except Exception as e:
@@ -329,10 +461,10 @@ async def get_database_stats(db: Session = Depends(get_db)):
 
 
 @app.post("/documents/{document_id}/cleanup")
-async def cleanup_old_versions(
+def cleanup_old_versions(
     document_id: int,
-    keep_versions: int = 10,
-    db: Session = Depends(get_db)
+    keep_versions: int = Query(10, ge=1),
+    db_service: DatabaseService = Depends(get_db_service)
 ):
     """
     Clean up old versions of a document
@@ -344,7 +476,6 @@ async def cleanup_old_versions(
         raise HTTPException(status_code=400, detail=str(e))
     
     try:
-        db_service = DatabaseService(db)
         deleted_count = db_service.cleanup_old_versions(document_id, keep_versions)
         
         return {
@@ -378,12 +509,26 @@ async def validate_file_security(
     Validate file security without processing
     """
     try:
-        # Read file content
-        content = await file.read()
-        
         # Generate safe filename
         safe_filename = SecurityManager.generate_safe_filename(file.filename)
         
+        # Size and extension are known from the spooled upload; reject before
+        # pulling the whole file into memory
+        reason = SecurityManager.quick_reject(file.filename, file.size)
+        if reason:
+            return {
+                "filename": file.filename,
+                "safe_filename": safe_filename,
+                "is_safe": False,
+                "reason": reason,
+                "file_size": file.size,
+                "file_hash": None,
+                "mime_type": "application/octet-stream"
+            }
+        
+        # Read file content
+        content = await file.read()
+        
         # Validate security
         is_safe, reason = SecurityManager.validate_file_security(safe_filename, content)
         
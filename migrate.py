@@ -5,24 +5,23 @@ Database migration management script for AI-Powered Knowledge Graph Builder
 
 import os
 import sys
-import subprocess
 from pathlib import Path
 
-def run_command(command, description):
-    """Run a command and handle errors"""
+from alembic import command as alembic_command
+from alembic.config import Config
+
+ALEMBIC_INI = Path(__file__).resolve().parent / "alembic.ini"
+
+
+def run_alembic(func, description, *args, **kwargs):
+    """Run an Alembic command in-process and handle errors"""
     print(f"🔄 {description}...")
     try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
+        func(Config(str(ALEMBIC_INI)), *args, **kwargs)
         print(f"✅ {description} completed successfully")
-        if result.stdout:
-            print(result.stdout)
         return True
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         print(f"❌ {description} failed: {e}")
-        if e.stdout:
-            print("STDOUT:", e.stdout)
-        if e.stderr:
-            print("STDERR:", e.stderr)
         return False
 
 def main():
@@ -46,30 +45,30 @@ def main():
     if command == "init":
         print("🚀 Initializing database...")
         # Run initial migration
-        if run_command("alembic upgrade head", "Applying initial migration"):
+        if run_alembic(alembic_command.upgrade, "Applying initial migration", "head"):
             print("✅ Database initialized successfully!")
         else:
             print("❌ Database initialization failed!")
             sys.exit(1)
     
     elif command == "upgrade":
-        run_command("alembic upgrade head", "Applying pending migrations")
+        run_alembic(alembic_command.upgrade, "Applying pending migrations", "head")
     
     elif command == "downgrade":
-        run_command("alembic downgrade -1", "Rolling back last migration")
+        run_alembic(alembic_command.downgrade, "Rolling back last migration", "-1")
     
     elif command == "revision":
         if len(sys.argv) < 3:
             print("Usage: python migrate.py revision <message>")
             return
         message = " ".join(sys.argv[2:])
-        run_command(f'alembic revision --autogenerate -m "{message}"', f"Creating migration: {message}")
+        run_alembic(alembic_command.revision, f"Creating migration: {message}", message=message, autogenerate=True)
     
     elif command == "history":
-        run_command("alembic history", "Showing migration history")
+        run_alembic(alembic_command.history, "Showing migration history")
     
     elif command == "current":
-        run_command("alembic current", "Showing current migration")
+        run_alembic(alembic_command.current, "Showing current migration")
     
     elif command == "seed":
         print("🌱 Running seed script...")
@@ -85,14 +84,14 @@ def main():
         print("🔄 Resetting database...")
         
         # Remove existing database
-        db_files = ["knowledge_graph.db", "knowledge_graph.db-journal"]
+        db_files = ["knowledge_graph.db", "knowledge_graph.db-journal", "knowledge_graph.db-wal", "knowledge_graph.db-shm"]
         for db_file in db_files:
             if os.path.exists(db_file):
                 os.remove(db_file)
                 print(f"🗑️  Removed {db_file}")
         
         # Run migrations
-        if run_command("alembic upgrade head", "Applying migrations"):
+        if run_alembic(alembic_command.upgrade, "Applying migrations", "head"):
             # Run seed
             print("🌱 Running seed script...")
             try:
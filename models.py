@@ -1,9 +1,21 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint, CheckConstraint
-from sqlalchemy.orm import relationship
+from typing import Any, Dict, List
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint, CheckConstraint, insert
+from sqlalchemy.orm import relationship, deferred, Session
 from datetime import datetime
 from database import Base
 
 
+class BulkInsertMixin:
+    """Core multi-row insert for high-volume tables, bypassing the ORM unit of work"""
+    
+    @classmethod
+    def bulk_insert(cls, session: Session, rows: List[Dict[str, Any]]) -> None:
+        # Table-level insert with a separate parameter list lets insertmanyvalues
+        # batch rows into multi-VALUES statements under bind-parameter limits
+        if rows:
+            session.execute(insert(cls.__table__), rows)
+
+
 class Document(Base):
     __tablename__ = "documents"
     
@@ -12,17 +24,21 @@ class Document(Base):
     file_type = Column(String(50), nullable=False)  # pdf, docx, txt, csv
     file_path = Column(String(500), nullable=False, unique=True)  # Ensure unique file paths
     upload_date = Column(DateTime, default=datetime.utcnow)
-    text_content = Column(Text, nullable=True)
+    content_sha256 = Column(String(64), nullable=True)  # sha256 of the uploaded file bytes
+    # Can be megabytes; only loaded on access or with undefer_group("content")
+    text_content = deferred(Column(Text, nullable=True), group="content")
     
     # Relationships
-    nodes = relationship("Node", back_populates="document", cascade="all, delete-orphan")
-    edges = relationship("Edge", back_populates="document", cascade="all, delete-orphan")
-    versions = relationship("Version", back_populates="document", cascade="all, delete-orphan")
+    nodes = relationship("Node", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
+    edges = relationship("Edge", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
+    versions = relationship("Version", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
+    deltas = relationship("DocumentDelta", back_populates="document", cascade="all, delete-orphan", passive_deletes=True)
     
     # Indexes for performance
     __table_args__ = (
         Index('idx_document_upload_date', 'upload_date'),
         Index('idx_document_file_type', 'file_type'),
+        Index('idx_document_content_sha256', 'content_sha256', unique=True),
     )
 
 
@@ -32,21 +48,44 @@ class Version(Base):
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
     version_number = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True)  # sha256 chaining the previous version's hash with the added text
     created_at = Column(DateTime, default=datetime.utcnow)
     
     # Relationships
     document = relationship("Document", back_populates="versions")
-    nodes = relationship("Node", back_populates="version", cascade="all, delete-orphan")
-    edges = relationship("Edge", back_populates="version", cascade="all, delete-orphan")
+    nodes = relationship("Node", back_populates="version", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
+    edges = relationship("Edge", back_populates="version", cascade="all, delete-orphan", passive_deletes=True, lazy="raise")
     
     # Indexes for performance
     __table_args__ = (
         Index('idx_version_document_id', 'document_id'),
+        Index('idx_version_document_number', 'document_id', 'version_number', unique=True),
+        Index('idx_version_document_hash', 'document_id', 'content_hash', unique=True),
         Index('idx_version_created_at', 'created_at'),
     )
 
 
-class Node(Base):
+class DocumentDelta(Base):
+    """Text appended to a document by an update, stored instead of rewriting text_content"""
+    __tablename__ = "document_deltas"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False)
+    # Kept when old versions are cleaned up; the text is still part of the document
+    version_id = Column(Integer, ForeignKey("versions.id", ondelete="SET NULL"), nullable=True)
+    text = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    document = relationship("Document", back_populates="deltas")
+    
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_delta_document_id', 'document_id', 'id'),
+    )
+
+
+class Node(BulkInsertMixin, Base):
     __tablename__ = "nodes"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -62,13 +101,15 @@ class Node(Base):
     
     # Indexes for performance
     __table_args__ = (
-        Index('idx_node_document_id', 'document_id'),
+        # The unique index leads with (document_id, version_id), so it also serves
+        # per-version and document_id-only lookups
+        UniqueConstraint('document_id', 'version_id', 'node_id', name='uq_node_doc_ver_id'),
         Index('idx_node_version_id', 'version_id'),
         Index('idx_node_type', 'node_type'),
     )
 
 
-class Edge(Base):
+class Edge(BulkInsertMixin, Base):
     __tablename__ = "edges"
     
     id = Column(Integer, primary_key=True, index=True)
@@ -84,9 +125,9 @@ class Edge(Base):
     
     # Indexes for performance
     __table_args__ = (
-        Index('idx_edge_document_id', 'document_id'),
+        # The unique index leads with (document_id, version_id), so it also serves
+        # per-version and document_id-only lookups; edges are only ever read per
+        # version, so source/target/relationship aren't indexed on their own
+        UniqueConstraint('document_id', 'version_id', 'source_node_id', 'target_node_id', 'relationship_type', name='uq_edge_full'),
         Index('idx_edge_version_id', 'version_id'),
-        Index('idx_edge_source', 'source_node_id'),
-        Index('idx_edge_target', 'target_node_id'),
-        Index('idx_edge_relationship', 'relationship_type'),
     )
\ No newline at end of file
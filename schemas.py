@@ -15,11 +15,17 @@ class EdgeSchema(BaseModel):
     relationship: str
 
 
+class ExtractedGraph(BaseModel):
+    """Graph shape enforced on the LLM when OpenAI structured outputs are enabled"""
+    nodes: List[NodeSchema]
+    edges: List[EdgeSchema]
+
+
 class GraphResponse(BaseModel):
     document_id: str
     version: int
-    nodes: List[dict]
-    edges: List[dict]
+    nodes: List[NodeSchema]
+    edges: List[EdgeSchema]
 
 
 class DocumentResponse(BaseModel):
@@ -38,4 +44,4 @@ class VersionInfo(BaseModel):
 
 class VersionListResponse(BaseModel):
     document_id: int
-    versions: List[dict]
\ No newline at end of file
+    versions: List[VersionInfo]
\ No newline at end of file
@@ -4,16 +4,79 @@ Handles file upload security, path validation, and access control.
 """
 
 import os
+import re
 import hashlib
+import secrets
 import magic
 from pathlib import Path
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 import logging
 
 from config import settings
 
 logger = logging.getLogger(__name__)
 
+# Suspicious content patterns, combined into a single case-insensitive alternation over bytes
+SUSPICIOUS_PATTERNS = [
+    rb'<script[^>]*>',  # Script tags
+    rb'javascript:',  # JavaScript URLs
+    rb'vbscript:',  # VBScript URLs
+    rb'data:text/html',  # Data URLs with HTML
+    rb'<iframe[^>]*>',  # Iframe tags
+    rb'<object[^>]*>',  # Object tags
+    rb'<embed[^>]*>',  # Embed tags
+    rb'<form[^>]*>',  # Form tags
+    rb'<input[^>]*>',  # Input tags
+    rb'<link[^>]*>',  # Link tags
+    rb'<meta[^>]*>',  # Meta tags
+    rb'<style[^>]*>',  # Style tags
+    rb'<link[^>]*stylesheet',  # Stylesheet links
+    rb'@import',  # CSS imports
+    rb'expression\s*\(',  # CSS expressions
+    rb'url\s*\(',  # CSS URLs
+    rb'<[^>]*on\w+\s*=',  # Event handlers
+    rb'<[^>]*href\s*=',  # Href attributes
+    rb'<[^>]*src\s*=',  # Src attributes
+]
+_SUSPICIOUS_RE = re.compile(b"|".join(b"(?:" + pattern + b")" for pattern in SUSPICIOUS_PATTERNS), re.IGNORECASE)
+
+# Common executable and script signatures
+EXECUTABLE_SIGNATURES = (
+    b'MZ',  # PE executable
+    b'\x7fELF',  # ELF executable
+    b'\xfe\xed\xfa',  # Mach-O executable
+    b'#!/bin/',  # Shell script
+    b'#!/usr/bin/',  # Shell script
+    b'#!/usr/local/bin/',  # Shell script
+    b'<?php',  # PHP script
+    b'<script',  # JavaScript
+    b'<%@',  # ASP script
+    b'<%',  # ASP script
+)
+_EXECUTABLE_SIGNATURES_RE = re.compile(b"|".join(re.escape(signature) for signature in EXECUTABLE_SIGNATURES))
+
+# MIME sniffing, markup patterns and executable signatures all look at the start
+# of a file; deep scanning of whole files is left to a dedicated AV scanner
+HEADER_SCAN_SIZE = 64 * 1024
+
+# One libmagic handle for the process; building it loads the magic database
+try:
+    _MAGIC_MIME = magic.Magic(mime=True)
+except Exception as e:
+    logger.warning(f"libmagic is not available, MIME validation disabled: {e}")
+    _MAGIC_MIME = None
+
+# Worker threads for scan_upload_directory
+SCAN_WORKERS = 16
+
+# Resolved once; every path check compares against it
+_UPLOAD_DIR_RESOLVED = Path(settings.UPLOAD_DIR).resolve()
+
+# Filename sanitizing
+_SANITIZE_RE = re.compile(r'[^\w\-_\.]')
+_UNDERSCORES_RE = re.compile(r'_+')
+
 
 class SecurityManager:
     """Handles security-related operations"""
@@ -71,6 +134,32 @@ class SecurityManager:
             logger.error(f"Failed to ensure upload directory: {e}")
             raise OSError(f"Cannot create or configure upload directory: {e}")
     
+    @classmethod
+    def quick_reject(cls, filename: str, content_length: Optional[int]) -> Optional[str]:
+        """
+        Cheap checks that need only the filename and size, run before the body is read
+        
+        Args:
+            filename: Name of the uploaded file
+            content_length: Size in bytes, or None if unknown
+            
+        Returns:
+            Rejection reason, or None if the file may be inspected further
+        """
+        if content_length is not None:
+            if content_length > cls.MAX_FILE_SIZE:
+                return f"File too large: {content_length} bytes (max: {cls.MAX_FILE_SIZE})"
+            
+            if content_length == 0:
+                return "Empty file"
+        
+        # Check for dangerous extensions
+        file_ext = Path(filename or '').suffix.lower()
+        if file_ext in cls.DANGEROUS_EXTENSIONS:
+            return f"Dangerous file extension: {file_ext}"
+        
+        return None
+    
     @classmethod
     def validate_file_security(cls, file_path: str, file_content: bytes) -> Tuple[bool, str]:
         """
@@ -84,38 +173,35 @@ class SecurityManager:
             Tuple of (is_safe, reason)
         """
         try:
-            # Check file size
-            if len(file_content) > cls.MAX_FILE_SIZE:
-                return False, f"File too large: {len(file_content)} bytes (max: {cls.MAX_FILE_SIZE})"
+            # Check file size and extension
+            reason = cls.quick_reject(file_path, len(file_content))
+            if reason:
+                return False, reason
             
-            if len(file_content) == 0:
-                return False, "Empty file"
-            
-            # Get file extension
             file_ext = Path(file_path).suffix.lower()
             
-            # Check for dangerous extensions
-            if file_ext in cls.DANGEROUS_EXTENSIONS:
-                return False, f"Dangerous file extension: {file_ext}"
+            # Content checks only inspect the header; libmagic needs real bytes, not a memoryview
+            header = file_content[:HEADER_SCAN_SIZE]
             
             # Validate MIME type
-            try:
-                mime_type = magic.from_buffer(file_content, mime=True)
-                allowed_types = cls.ALLOWED_MIME_TYPES.get(file_ext, [])
-                
-                if allowed_types and mime_type not in allowed_types:
-                    return False, f"Invalid MIME type: {mime_type} for extension {file_ext}"
+            if _MAGIC_MIME is not None:
+                try:
+                    mime_type = _MAGIC_MIME.from_buffer(header)
+                    allowed_types = cls.ALLOWED_MIME_TYPES.get(file_ext, [])
                     
-            except Exception as e:
-                logger.warning(f"Could not determine MIME type: {e}")
-                # Continue without MIME validation if magic is not available
+                    if allowed_types and mime_type not in allowed_types:
+                        return False, f"Invalid MIME type: {mime_type} for extension {file_ext}"
+                        
+                except Exception as e:
+                    logger.warning(f"Could not determine MIME type: {e}")
+                    # Continue without MIME validation if detection fails
             
             # Check for suspicious content patterns
-            if cls._contains_suspicious_content(file_content):
+            if cls._contains_suspicious_content(header):
                 return False, "File contains suspicious content patterns"
             
             # Check for embedded scripts or executables
-            if cls._contains_embedded_executables(file_content):
+            if cls._contains_embedded_executables(header):
                 return False, "File contains embedded executables or scripts"
             
             return True, "File is safe"
@@ -135,40 +221,11 @@ class SecurityManager:
         Returns:
             True if suspicious content is found
         """
-        # Convert to string for pattern matching
-        try:
-            text = content.decode('utf-8', errors='ignore').lower()
-        except:
-            text = str(content).lower()
-        
-        # Suspicious patterns
-        suspicious_patterns = [
-            r'<script[^>]*>',  # Script tags
-            r'javascript:',  # JavaScript URLs
-            r'vbscript:',  # VBScript URLs
-            r'data:text/html',  # Data URLs with HTML
-            r'<iframe[^>]*>',  # Iframe tags
-            r'<object[^>]*>',  # Object tags
-            r'<embed[^>]*>',  # Embed tags
-            r'<form[^>]*>',  # Form tags
-            r'<input[^>]*>',  # Input tags
-            r'<link[^>]*>',  # Link tags
-            r'<meta[^>]*>',  # Meta tags
-            r'<style[^>]*>',  # Style tags
-            r'<link[^>]*stylesheet',  # Stylesheet links
-            r'@import',  # CSS imports
-            r'expression\s*\(',  # CSS expressions
-            r'url\s*\(',  # CSS URLs
-            r'<[^>]*on\w+\s*=',  # Event handlers
-            r'<[^>]*href\s*=',  # Href attributes
-            r'<[^>]*src\s*=',  # Src attributes
-        ]
-        
-        import re
-        for pattern in suspicious_patterns:
-            if re.search(pattern, text):
-                logger.warning(f"Suspicious content pattern found: {pattern}")
-                return True
+        # Match the raw bytes directly; no decoded or lowercased copy of the file
+        match = _SUSPICIOUS_RE.search(content)
+        if match:
+            logger.warning(f"Suspicious content pattern found: {match.group(0)[:100]!r}")
+            return True
         
         return False
     
@@ -183,24 +240,11 @@ class SecurityManager:
         Returns:
             True if embedded executables are found
         """
-        # Check for common executable signatures
-        executable_signatures = [
-            b'MZ',  # PE executable
-            b'\x7fELF',  # ELF executable
-            b'\xfe\xed\xfa',  # Mach-O executable
-            b'#!/bin/',  # Shell script
-            b'#!/usr/bin/',  # Shell script
-            b'#!/usr/local/bin/',  # Shell script
-            b'<?php',  # PHP script
-            b'<script',  # JavaScript
-            b'<%@',  # ASP script
-            b'<%',  # ASP script
-        ]
-        
-        for signature in executable_signatures:
-            if signature in content:
-                logger.warning(f"Embedded executable signature found: {signature}")
-                return True
+        # Single scan of the buffer for every signature
+        match = _EXECUTABLE_SIGNATURES_RE.search(content)
+        if match:
+            logger.warning(f"Embedded executable signature found: {match.group(0)}")
+            return True
         
         return False
     
@@ -221,9 +265,8 @@ class SecurityManager:
         ext = path.suffix.lower()
         
         # Sanitize name
-        import re
-        safe_name = re.sub(r'[^\w\-_\.]', '_', name)
-        safe_name = re.sub(r'_+', '_', safe_name)  # Replace multiple underscores
+        safe_name = _SANITIZE_RE.sub('_', name)
+        safe_name = _UNDERSCORES_RE.sub('_', safe_name)  # Replace multiple underscores
         safe_name = safe_name.strip('_')
         
         if not safe_name:
@@ -233,30 +276,9 @@ class SecurityManager:
         if len(safe_name) > 100:
             safe_name = safe_name[:100]
         
-        # Generate unique filename
-        base_filename = f"{safe_name}{ext}"
-        counter = 1
-        
-        while True:
-            if counter == 1:
-                filename = base_filename
-            else:
-                name_part = safe_name
-                if len(name_part) > 90:  # Leave room for counter
-                    name_part = name_part[:90]
-                filename = f"{name_part}_{counter}{ext}"
-            
-            # Check if file exists
-            file_path = Path(settings.UPLOAD_DIR) / filename
-            if not file_path.exists():
-                return filename
-            
-            counter += 1
-            if counter > 1000:  # Prevent infinite loop
-                # Use hash-based naming as fallback
-                import hashlib
-                hash_suffix = hashlib.md5(original_filename.encode()).hexdigest()[:8]
-                return f"{safe_name}_{hash_suffix}{ext}"
+        # A random suffix keeps names unique without touching the filesystem;
+        # an existence check would cost a stat() and only hold until the write
+        return f"{safe_name[:83]}_{secrets.token_hex(8)}{ext}"
     
     @classmethod
     def validate_file_path(cls, file_path: str) -> bool:
@@ -270,11 +292,8 @@ class SecurityManager:
             True if path is safe
         """
         try:
-            upload_dir = Path(settings.UPLOAD_DIR).resolve()
-            file_path = Path(file_path).resolve()
-            
-            # Check if file is within upload directory
-            return str(file_path).startswith(str(upload_dir))
+            # Component-wise check, so "/uploads_evil" doesn't pass for "/uploads"
+            return Path(file_path).resolve().is_relative_to(_UPLOAD_DIR_RESOLVED)
             
         except Exception as e:
             logger.error(f"Path validation error: {e}")
@@ -315,52 +334,81 @@ class SecurityManager:
         }
         
         try:
-            for file_path in upload_dir.rglob('*'):
-                if file_path.is_file():
+            # Files are checked concurrently; each check is a small read plus libmagic
+            with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+                for findings in executor.map(cls._scan_file, _iter_files(str(upload_dir))):
                     results["total_files"] += 1
-                    
-                    try:
-                        # Check file size
-                        file_size = file_path.stat().st_size
-                        if file_size > cls.MAX_FILE_SIZE:
-                            results["large_files"].append({
-                                "path": str(file_path),
-                                "size": file_size
-                            })
-                        
-                        # Check file content
-                        with open(file_path, 'rb') as f:
-                            content = f.read(1024)  # Read first 1KB
-                            
-                        is_safe, reason = cls.validate_file_security(str(file_path), content)
-                        if not is_safe:
-                            results["suspicious_files"].append({
-                                "path": str(file_path),
-                                "reason": reason
-                            })
-                        
-                        # Check file type
-                        try:
-                            mime_type = magic.from_file(str(file_path), mime=True)
-                            ext = file_path.suffix.lower()
-                            allowed_types = cls.ALLOWED_MIME_TYPES.get(ext, [])
-                            
-                            if allowed_types and mime_type not in allowed_types:
-                                results["unknown_types"].append({
-                                    "path": str(file_path),
-                                    "mime_type": mime_type,
-                                    "extension": ext
-                                })
-                        except:
-                            pass  # Skip MIME type check if magic is not available
-                            
-                    except Exception as e:
-                        results["errors"].append({
-                            "path": str(file_path),
-                            "error": str(e)
-                        })
+                    for category, finding in findings:
+                        results[category].append(finding)
         
         except Exception as e:
             results["error"] = f"Directory scan failed: {e}"
         
-        return results
\ No newline at end of file
+        return results
+    
+    @classmethod
+    def _scan_file(cls, entry: os.DirEntry) -> List[Tuple[str, dict]]:
+        """
+        Run the upload-directory checks on a single file
+        
+        Args:
+            entry: Directory entry for the file
+            
+        Returns:
+            List of (result category, finding) pairs
+        """
+        findings = []
+        file_path = entry.path
+        
+        try:
+            # Check file size; scandir already has the stat result
+            file_size = entry.stat(follow_symlinks=False).st_size
+            if file_size > cls.MAX_FILE_SIZE:
+                findings.append(("large_files", {
+                    "path": file_path,
+                    "size": file_size
+                }))
+            
+            # Check file content
+            with open(file_path, 'rb') as f:
+                content = f.read(1024)  # Read first 1KB
+                
+            is_safe, reason = cls.validate_file_security(file_path, content)
+            if not is_safe:
+                findings.append(("suspicious_files", {
+                    "path": file_path,
+                    "reason": reason
+                }))
+            
+            # Check file type
+            try:
+                mime_type = _MAGIC_MIME.from_file(file_path)
+                ext = os.path.splitext(entry.name)[1].lower()
+                allowed_types = cls.ALLOWED_MIME_TYPES.get(ext, [])
+                
+                if allowed_types and mime_type not in allowed_types:
+                    findings.append(("unknown_types", {
+                        "path": file_path,
+                        "mime_type": mime_type,
+                        "extension": ext
+                    }))
+            except:
+                pass  # Skip MIME type check if magic is not available
+                
+        except Exception as e:
+            findings.append(("errors", {
+                "path": file_path,
+                "error": str(e)
+            }))
+        
+        return findings
+
+
+def _iter_files(directory: str) -> Iterator[os.DirEntry]:
+    """Recursively yield regular files under a directory using os.scandir"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
@@ -1,16 +1,193 @@
 import os
-import json
+import asyncio
+import bisect
+import hashlib
 import re
 import logging
+import mmap
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from itertools import repeat
 from typing import Dict, List, Optional
 import PyPDF2
 import docx
 import csv
-import requests
+import orjson
+import httpx
 from config import settings
+from schemas import ExtractedGraph
 
 logger = logging.getLogger(__name__)
 
+# pdfium (C++) extracts text an order of magnitude faster than PyPDF2; PyPDF2
+# stays as the fallback when the wheel isn't available
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    logger.warning("pypdfium2 is not installed, falling back to PyPDF2 for PDF extraction")
+    pdfium = None
+
+# pdfium isn't thread-safe, so big PDFs are split into page ranges across worker
+# processes; below this many pages the pool startup costs more than it saves
+PDF_PARALLEL_MIN_PAGES = 16
+
+# Forking a threaded server process isn't safe; forkserver/spawn start clean workers
+_PDF_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _pdfium_page_text(pdf, index: int) -> str:
+    """Text of one page of an open pdfium document"""
+    page = pdf[index]
+    textpage = page.get_textpage()
+    try:
+        return textpage.get_text_range()
+    finally:
+        textpage.close()
+        page.close()
+
+
+def _pdfium_page_range_text(file_path: str, start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop); runs in a worker process with its own document handle"""
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return [_pdfium_page_text(pdf, index) for index in range(start, stop)]
+    finally:
+        pdf.close()
+
+
+# Single-text extraction prompt; only the text between prefix and suffix varies
+_EXTRACTION_PROMPT_PREFIX = """Extract entities and relationships from the following text and return ONLY a valid JSON object with this exact structure:
+
+{
+  "nodes": [
+    {"id": "n1", "label": "Entity Name", "type": "Person"},
+    {"id": "n2", "label": "Another Entity", "type": "Organization"}
+  ],
+  "edges": [
+    {"source": "n1", "target": "n2", "relationship": "works_at"}
+  ]
+}
+
+Entity types can be: Person, Organization, Location, Concept, Event, Product, Technology, etc.
+Relationships should be concise verbs or phrases like: works_at, located_in, founded_by, created, manages, etc.
+
+Text to analyze:
+"""
+_EXTRACTION_PROMPT_SUFFIX = """
+
+Return ONLY the JSON object, no other text."""
+
+# Fallback strategies for pulling a JSON object out of free-form LLM output
+_CODE_BLOCK_JSON_RES = [
+    re.compile(r'```json\s*(\{[\s\S]*?\})\s*```', re.DOTALL),  # JSON in code block
+    re.compile(r'```\s*(\{[\s\S]*?\})\s*```', re.DOTALL),  # Generic code block
+    re.compile(r'`(\{[\s\S]*?\})`', re.DOTALL),  # Inline code
+]
+_BARE_JSON_RES = [
+    re.compile(r'\{[\s\S]*\}', re.DOTALL),  # Simple object
+    re.compile(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', re.DOTALL),  # Nested object
+]
+_JSON_REPAIRS = [
+    (re.compile(r',\s*}'), '}'),  # Remove trailing commas
+    (re.compile(r',\s*]'), ']'),  # Remove trailing commas in arrays
+    (re.compile(r'([{,]\s*)(\w+):'), r'\1"\2":'),  # Quote unquoted keys
+    (re.compile(r':\s*([^",{\[\s][^,}]*?)(\s*[,}])'), r': "\1"\2'),  # Quote unquoted string values
+]
+
+# Process-wide LRU of LLM extraction results keyed by a digest of the configured
+# providers, models, prompt version and text, optionally backed by JSON files in
+# EXTRACTION_CACHE_DIR. Rule-based fallbacks are not cached so a later call can
+# still reach the LLM. Bump EXTRACTION_PROMPT_VERSION when the prompts change.
+EXTRACTION_PROMPT_VERSION = 1
+_extraction_cache: "OrderedDict[str, Dict]" = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+
+# Corrective follow-ups sent to OpenAI when its output is unusable, and the
+# problem description used when a parsed graph fails validation
+OPENAI_FEEDBACK_RETRIES = 2
+GRAPH_SHAPE_FEEDBACK = (
+    "the graph does not match the required structure; every node needs a non-empty "
+    "id, label and type, and every edge a non-empty source, target and relationship"
+)
+
+# Windows of a chunked text extracted at the same time
+CHUNK_EXTRACTION_WORKERS = 4
+
+# Seconds a successful Ollama health check is trusted before probing again
+OLLAMA_HEALTH_TTL = 30
+
+# Retry timeout for LLM requests, as a multiple of the configured first-attempt timeout
+LLM_RETRY_TIMEOUT_FACTOR = 3
+
+
+def _retry_timeouts(timeout: int) -> tuple:
+    """Timeouts for the first attempt and the single retry of an LLM request"""
+    return (timeout, timeout * LLM_RETRY_TIMEOUT_FACTOR)
+
+
+# Sentence punctuation; relationship matches never span it
+_SENTENCE_END_RE = re.compile(r'[.!?]+')
+
+# Rule-based entity candidates: multi-word proper nouns, minus common sentence starters
+_CAPITALIZED_RE = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b')
+ENTITY_STOP_WORDS = frozenset({'In', 'The', 'A', 'An', 'This', 'That', 'These', 'Those', 'It', 'Is', 'Was', 'Are', 'Were', 'Be', 'Been'})
+MAX_RULE_ENTITIES = 15
+
+# Substring indicators used by _guess_entity_type, checked in this order
+ORG_KEYWORDS = ('corporation', 'corp', 'company', 'inc', 'ltd', 'llc', 'university', 'institute', 'department', 'division')
+LOCATION_KEYWORDS = ('city', 'country', 'state', 'street', 'avenue', 'road', 'york', 'francisco', 'london', 'paris', 'tokyo')
+TECH_KEYWORDS = ('bot', 'app', 'system', 'platform', 'software', 'tool', 'ai', 'tech')
+TITLE_KEYWORDS = ('engineer', 'manager', 'director', 'ceo', 'cto', 'cfo', 'president', 'vice president')
+
+# Relationship patterns for rule-based extraction: (pattern, relationship type, keywords).
+# A pattern can only match text containing one of its keywords (case-folded),
+# so a substring check skips the regex entirely when none appear; None means always run it.
+RELATIONSHIP_PATTERNS = [
+    # CEO/Leadership patterns
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+the\s+CEO\s+of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'ceo_of', ('ceo',)),
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+the\s+CTO\s+of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'cto_of', ('cto',)),
+    
+    # Work relationships
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:works?|worked|working)\s+(?:as\s+a?\s+)?(?:\w+\s+)?(?:at|for|in|with)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'works_at', ('work',)),
+    
+    # Founding/Creation with location
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+founded\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+in\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'founded', ('founded',)),
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:founded|established|created|started)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'founded', ('founded', 'established', 'created', 'started')),
+    
+    # Location - with "in" pattern
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+in\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+in\s+\d{4}', 'located_in', None),
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),?\s+(?:headquartered|located|based)\s+in\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'located_in', ('headquartered', 'located', 'based')),
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+located\s+in\s+(?:the\s+)?(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'located_in', ('located',)),
+    
+    # Acquisition with details
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+acquired\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:for|in)', 'acquired', ('acquired',)),
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:acquired|bought|purchased)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'acquired', ('acquired', 'bought', 'purchased')),
+    
+    # Management
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:manages|managed|leads|led|oversees)\s+(?:the\s+)?(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'manages', ('manage', 'lead', 'led', 'oversee')),
+    
+    # Role/Position
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+serves\s+as\s+(?:\w+\s+)?of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'member_of', ('serves',)),
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+now\s+serves\s+as\s+\w+\s+of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'member_of', ('serves',)),
+    
+    # Development
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+developed\s+(?:an?\s+)?(?:\w+\s+)?(?:platform\s+)?called\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'developed', ('called',)),
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:developed|built|designed|created)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'developed', ('developed', 'built', 'designed', 'created')),
+    
+    # Usage
+    (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+used\s+by\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'used_by', ('used',)),
+]
+_RELATIONSHIP_RES = [
+    (re.compile(pattern, re.IGNORECASE), rel_type, keywords)
+    for pattern, rel_type, keywords in RELATIONSHIP_PATTERNS
+]
+
 
 class DocumentProcessor:
     """
@@ -34,12 +211,37 @@ class DocumentProcessor:
     
     def _extract_from_pdf(self, file_path: str) -> str:
         """Extract text from PDF"""
-        text = ""
+        if pdfium is None:
+            return self._extract_from_pdf_pypdf2(file_path)
+        
+        pages = None
+        pdf = pdfium.PdfDocument(file_path)
+        try:
+            page_count = len(pdf)
+            workers = min(os.cpu_count() or 1, page_count // PDF_PARALLEL_MIN_PAGES)
+            if workers < 2:
+                pages = [_pdfium_page_text(pdf, index) for index in range(page_count)]
+        finally:
+            pdf.close()
+        
+        if pages is None:
+            # One contiguous page range per worker, reassembled in order
+            step = -(-page_count // workers)
+            starts = range(0, page_count, step)
+            stops = [min(start + step, page_count) for start in starts]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_PDF_MP_CONTEXT) as executor:
+                chunks = executor.map(_pdfium_page_range_text, repeat(file_path), starts, stops)
+                pages = [text for chunk in chunks for text in chunk]
+        
+        # pdfium ends lines with CRLF; keep the same line endings as the other extractors
+        return "\n".join(pages).replace("\r\n", "\n").strip()
+    
+    def _extract_from_pdf_pypdf2(self, file_path: str) -> str:
+        """Extract text from PDF with the pure-Python reader"""
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+            pages = [page.extract_text() for page in pdf_reader.pages]
+        return "\n".join(pages).strip()
     
     def _extract_from_docx(self, file_path: str) -> str:
         """Extract text from DOCX"""
@@ -49,17 +251,22 @@ class DocumentProcessor:
     
     def _extract_from_txt(self, file_path: str) -> str:
         """Extract text from TXT"""
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read().strip()
+        with open(file_path, 'rb') as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return ""
+            # Decode straight from the mapped pages instead of reading into a bytes copy first
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                text = str(mm, 'utf-8')
+                has_cr = mm.find(b'\r') != -1
+        if has_cr:
+            # Same newline translation as reading in text mode
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text.strip()
     
     def _extract_from_csv(self, file_path: str) -> str:
         """Extract text from CSV"""
-        text_lines = []
         with open(file_path, 'r', encoding='utf-8') as file:
-            csv_reader = csv.reader(file)
-            for row in csv_reader:
-                text_lines.append(", ".join(row))
-        return "\n".join(text_lines)
+            return "\n".join(", ".join(row) for row in csv.reader(file))
 
 
 class KnowledgeGraphExtractor:
@@ -72,22 +279,41 @@ class KnowledgeGraphExtractor:
         self.model = settings.OLLAMA_MODEL
         self.use_openai = getattr(settings, 'USE_OPENAI', False)
         self.openai_key = getattr(settings, 'OPENAI_API_KEY', None)
+        # Pooled keep-alive connections to Ollama, shared by every sync request
+        self._http = httpx.Client(timeout=settings.OLLAMA_TIMEOUT)
+        self._ollama_healthy_until = 0.0
     
     def extract_graph(self, text: str) -> Dict:
         """
         Extract knowledge graph from text using LLM with robust error handling
+        
+        LLM results are cached per text (see EXTRACTION_CACHE_SIZE) and the
+        returned dict may be shared with other callers, so it must not be mutated.
         """
         # Validate input text
         if not text or not text.strip():
             logger.warning("Empty text provided for extraction")
             return {"nodes": [], "edges": []}
         
+        # Long texts can be split into overlapping windows that are extracted separately
+        llm_configured = (self.use_openai and self.openai_key) or settings.USE_OLLAMA
+        if llm_configured and settings.LLM_MAX_CHUNKS > 1 and len(text) > settings.LLM_MAX_INPUT_CHARS:
+            return self._extract_graph_chunked(text)
+        
+        # Re-processing the same text reuses the earlier LLM result
+        cache_key = self._extraction_cache_key(text)
+        cached = self._cached_extraction(cache_key)
+        if cached is not None:
+            logger.info("Using cached extraction result")
+            return cached
+        
         # Try OpenAI first if configured
         if self.use_openai and self.openai_key:
             try:
                 logger.info("Using OpenAI for extraction")
                 result = self._extract_with_openai(text)
                 if self._validate_extraction_result(result):
+                    self._cache_extraction(cache_key, result)
                     return result
                 else:
                     logger.warning("OpenAI result validation failed, trying fallback")
@@ -104,6 +330,7 @@ class KnowledgeGraphExtractor:
             logger.info("Using Ollama for extraction")
             result = self._extract_with_ollama(text)
             if self._validate_extraction_result(result):
+                self._cache_extraction(cache_key, result)
                 return result
             else:
                 logger.warning("Ollama result validation failed, trying fallback")
@@ -114,6 +341,257 @@ class KnowledgeGraphExtractor:
         logger.info("Falling back to rule-based extraction")
         return self._extract_with_rules(text)
     
+    def _extract_graph_chunked(self, text: str) -> Dict:
+        """
+        Extract each window of a long text concurrently and merge the graphs
+        
+        Every window goes through extract_graph on its own, so it gets the usual
+        caching and fallbacks; nodes are merged on label by merge_graphs.
+        """
+        chunks = self._chunk_text(text)
+        logger.info(f"Extracting {len(chunks)} overlapping chunks of a {len(text)}-character text")
+        with ThreadPoolExecutor(max_workers=min(len(chunks), CHUNK_EXTRACTION_WORKERS)) as executor:
+            graphs = list(executor.map(self.extract_graph, chunks))
+        
+        merged = {"nodes": [], "edges": []}
+        for graph in graphs:
+            merged = self.merge_graphs(merged, graph)
+        return merged
+    
+    def _chunk_text(self, text: str) -> List[str]:
+        """
+        Split text into word-aligned windows of LLM_MAX_INPUT_CHARS that overlap by
+        LLM_CHUNK_OVERLAP characters, keeping at most LLM_MAX_CHUNKS of them
+        """
+        limit = settings.LLM_MAX_INPUT_CHARS
+        overlap = min(settings.LLM_CHUNK_OVERLAP, limit // 2)
+        chunks = []
+        start = 0
+        while start < len(text) and len(chunks) < settings.LLM_MAX_CHUNKS:
+            chunk = self._truncate_for_prompt(text[start:start + limit + 1])
+            chunks.append(chunk)
+            if start + len(chunk) >= len(text):
+                break
+            start += len(chunk) - overlap
+            # Begin the next window on a word boundary inside the overlap
+            space = text.find(' ', start, start + overlap)
+            if space != -1:
+                start = space + 1
+        return chunks
+    
+    def _extraction_cache_key(self, text: str) -> str:
+        """Cache key covering everything that decides the LLM result for this text"""
+        providers = []
+        if self.use_openai and self.openai_key:
+            providers.append(f"openai:{getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo')}")
+        if settings.USE_OLLAMA:
+            providers.append(f"ollama:{self.model}")
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{','.join(providers)}|v{EXTRACTION_PROMPT_VERSION}|{settings.LLM_MAX_INPUT_CHARS}|".encode('utf-8'))
+        # Whitespace-only differences (re-wrapped lines, trailing spaces) share an entry
+        digest.update(" ".join(text.split()).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def _cached_extraction(self, cache_key: str) -> Optional[Dict]:
+        """Return a cached extraction result from memory or the on-disk cache, if any"""
+        with _extraction_cache_lock:
+            cached = _extraction_cache.get(cache_key)
+            if cached is not None:
+                _extraction_cache.move_to_end(cache_key)
+                return cached
+        
+        if not settings.EXTRACTION_CACHE_DIR:
+            return None
+        try:
+            with open(os.path.join(settings.EXTRACTION_CACHE_DIR, f"{cache_key}.json"), 'rb') as file:
+                result = orjson.loads(file.read()).get('result')
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable extraction cache entry {cache_key}: {e}")
+            return None
+        
+        if not self._validate_extraction_result(result):
+            return None
+        self._cache_extraction(cache_key, result, persist=False)
+        return result
+    
+    @staticmethod
+    def _cache_extraction(cache_key: str, result: Dict, persist: bool = True) -> None:
+        """Remember an LLM extraction result, evicting the least recently used entries"""
+        if settings.EXTRACTION_CACHE_SIZE > 0:
+            with _extraction_cache_lock:
+                _extraction_cache[cache_key] = result
+                _extraction_cache.move_to_end(cache_key)
+                while len(_extraction_cache) > settings.EXTRACTION_CACHE_SIZE:
+                    _extraction_cache.popitem(last=False)
+        
+        if persist and settings.EXTRACTION_CACHE_DIR:
+            path = os.path.join(settings.EXTRACTION_CACHE_DIR, f"{cache_key}.json")
+            entry = {"created_at": datetime.utcnow().isoformat(), "result": result}
+            try:
+                os.makedirs(settings.EXTRACTION_CACHE_DIR, exist_ok=True)
+                # Write then rename so concurrent readers never see a partial file
+                temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(temp_path, 'wb') as file:
+                    file.write(orjson.dumps(entry))
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write extraction cache entry {cache_key}: {e}")
+    
+    def extract_graph_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[Dict]:
+        """
+        Extract knowledge graphs for several texts, packing them into shared Ollama requests
+        
+        Texts are sent batch_size at a time in one numbered prompt. Any text whose
+        result is missing or invalid in the batched response goes through
+        extract_graph on its own, so the returned list always lines up with texts.
+        
+        Args:
+            texts: Texts to extract from
+            batch_size: Texts per Ollama request (defaults to OLLAMA_BATCH_SIZE)
+            
+        Returns:
+            One graph per input text, in order
+        """
+        batch_size = batch_size or settings.OLLAMA_BATCH_SIZE
+        results: List[Optional[Dict]] = [None] * len(texts)
+        
+        # OpenAI and rule-based extraction keep the per-text path
+        if settings.USE_OLLAMA and not (self.use_openai and self.openai_key) and batch_size > 1:
+            for start in range(0, len(texts), batch_size):
+                indices = [
+                    i for i in range(start, min(start + batch_size, len(texts)))
+                    if texts[i] and texts[i].strip()
+                ]
+                if len(indices) < 2:
+                    continue
+                try:
+                    logger.info(f"Using Ollama for batched extraction of {len(indices)} texts")
+                    graphs = self._extract_batch_with_ollama([texts[i] for i in indices])
+                except Exception as e:
+                    logger.error(f"Ollama batch extraction failed: {e}")
+                    continue
+                for i, graph in zip(indices, graphs):
+                    if graph is not None and self._validate_extraction_result(graph):
+                        results[i] = graph
+        
+        return [
+            result if result is not None else self.extract_graph(text)
+            for result, text in zip(results, texts)
+        ]
+    
+    async def extract_graph_many(self, texts: List[str], concurrency: int = 8) -> List[Dict]:
+        """
+        Extract knowledge graphs for several texts concurrently
+        
+        Follows the same OpenAI -> Ollama -> rule-based fallback order as
+        extract_graph, with at most `concurrency` LLM requests in flight.
+        
+        Args:
+            texts: Texts to extract from
+            concurrency: Maximum number of simultaneous LLM requests
+            
+        Returns:
+            One graph per input text, in order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        openai_client = None
+        if self.use_openai and self.openai_key:
+            from openai import AsyncOpenAI
+            openai_client = AsyncOpenAI(api_key=self.openai_key)
+        
+        async with httpx.AsyncClient(timeout=settings.OLLAMA_TIMEOUT) as ollama_client:
+            # One availability check for the whole run instead of one per text
+            ollama_available = False
+            if settings.USE_OLLAMA:
+                try:
+                    health_response = await ollama_client.get(f"{self.ollama_url}/api/tags", timeout=5)
+                    ollama_available = health_response.status_code == 200
+                except httpx.HTTPError as e:
+                    logger.error(f"Cannot connect to Ollama: {e}")
+            
+            async def extract_one(text: str) -> Dict:
+                if not text or not text.strip():
+                    logger.warning("Empty text provided for extraction")
+                    return {"nodes": [], "edges": []}
+                
+                if openai_client is not None:
+                    try:
+                        async with semaphore:
+                            result = await self._extract_with_openai_async(text, openai_client)
+                        if self._validate_extraction_result(result):
+                            return result
+                        logger.warning("OpenAI result validation failed, trying fallback")
+                    except Exception as e:
+                        logger.error(f"OpenAI extraction failed: {e}")
+                
+                if ollama_available:
+                    try:
+                        async with semaphore:
+                            result = await self._extract_with_ollama_async(text, ollama_client)
+                        if self._validate_extraction_result(result):
+                            return result
+                        logger.warning("Ollama result validation failed, trying fallback")
+                    except Exception as e:
+                        logger.error(f"Ollama extraction failed: {e}")
+                
+                return await asyncio.to_thread(self._extract_with_rules, text)
+            
+            try:
+                return await asyncio.gather(*(extract_one(text) for text in texts))
+            finally:
+                if openai_client is not None:
+                    await openai_client.close()
+    
+    def merge_graphs(self, base_graph: Dict, new_graph: Dict) -> Dict:
+        """
+        Merge a graph extracted from new text into an existing graph
+        
+        Nodes are matched on case-insensitive label; unmatched nodes get fresh
+        IDs that don't collide with the base graph. Duplicate edges are dropped.
+        
+        Args:
+            base_graph: Existing graph with 'nodes' and 'edges'
+            new_graph: Graph extracted from the added text
+            
+        Returns:
+            Merged graph data
+        """
+        nodes = [dict(node) for node in base_graph.get('nodes', [])]
+        edges = [dict(edge) for edge in base_graph.get('edges', [])]
+        
+        # Small models sometimes return numeric labels, which validation lets through
+        label_to_id = {str(node['label']).lower(): node['id'] for node in nodes}
+        used_ids = {node['id'] for node in nodes}
+        edge_keys = {(e['source'], e['target'], e['relationship']) for e in edges}
+        
+        next_index = len(nodes) + 1
+        id_map = {}
+        for node in new_graph.get('nodes', []):
+            label_key = str(node['label']).lower()
+            existing_id = label_to_id.get(label_key)
+            if existing_id is None:
+                while f"n{next_index}" in used_ids:
+                    next_index += 1
+                existing_id = f"n{next_index}"
+                used_ids.add(existing_id)
+                label_to_id[label_key] = existing_id
+                nodes.append({'id': existing_id, 'label': node['label'], 'type': node['type']})
+            id_map[node['id']] = existing_id
+        
+        for edge in new_graph.get('edges', []):
+            source = id_map.get(edge['source'])
+            target = id_map.get(edge['target'])
+            if not source or not target or source == target:
+                continue
+            key = (source, target, edge['relationship'])
+            if key not in edge_keys:
+                edge_keys.add(key)
+                edges.append({'source': source, 'target': target, 'relationship': edge['relationship']})
+        
+        return {'nodes': nodes, 'edges': edges}
+    
     def _validate_extraction_result(self, result: Dict) -> bool:
         """
         Validate extraction result structure and content
@@ -182,53 +660,193 @@ class KnowledgeGraphExtractor:
         prompt = self._create_extraction_prompt(text)
         
         try:
-            # Check if Ollama is available
-            health_response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
-            if health_response.status_code != 200:
-                raise Exception("Ollama service not available")
+            graph_text = self._ollama_generate(prompt)
             
-            response = requests.post(
+            # Parse the JSON response with multiple fallback strategies
+            graph_data = self._parse_llm_response(graph_text)
+            return self._validate_and_format_graph(graph_data)
+        except Exception as e:
+            logger.error(f"Ollama extraction error: {e}")
+            raise
+    
+    def _ollama_generate(self, prompt: str, num_predict: int = 2000) -> str:
+        """
+        Send a prompt to Ollama's generate endpoint and return the raw response text
+        """
+        try:
+            # Check if Ollama is available, unless it answered recently
+            if time.monotonic() >= self._ollama_healthy_until:
+                health_response = self._http.get(f"{self.ollama_url}/api/tags", timeout=5)
+                if health_response.status_code != 200:
+                    raise Exception("Ollama service not available")
+                self._ollama_healthy_until = time.monotonic() + OLLAMA_HEALTH_TTL
+            
+            # A short first attempt, then one longer retry for slow generations
+            for timeout in _retry_timeouts(settings.OLLAMA_TIMEOUT):
+                try:
+                    with self._http.stream(
+                        "POST",
+                        f"{self.ollama_url}/api/generate",
+                        json=self._ollama_payload(prompt, num_predict, stream=True),
+                        timeout=timeout
+                    ) as response:
+                        return self._read_ollama_stream(response)
+                except httpx.TimeoutException:
+                    logger.warning(f"Ollama request timed out after {timeout}s")
+            logger.error("Ollama request timeout")
+            raise Exception("Ollama timeout")
+        except httpx.TransportError:
+            self._ollama_healthy_until = 0.0
+            logger.error("Cannot connect to Ollama")
+            raise Exception("Ollama connection error")
+    
+    def warm_up(self) -> None:
+        """
+        Ask Ollama to load the model now so the first extraction doesn't wait for it
+        """
+        try:
+            # A generate request without a prompt only loads the model
+            response = self._http.post(
                 f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "format": "json",
-                    "options": {
-                        "temperature": 0.7,
-                        "num_predict": 2000,  # Increased for better results
-                        "top_p": 0.9,
-                        "repeat_penalty": 1.1
-                    }
-                },
+                json={"model": self.model, "keep_alive": settings.OLLAMA_KEEP_ALIVE},
                 timeout=settings.OLLAMA_TIMEOUT
             )
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not preload Ollama model {self.model}: {e}")
+            return
+        if response.status_code == 200:
+            self._ollama_healthy_until = time.monotonic() + OLLAMA_HEALTH_TTL
+            logger.info(f"Ollama model {self.model} loaded")
+        else:
+            logger.warning(f"Could not preload Ollama model {self.model}: HTTP {response.status_code}")
+    
+    def _ollama_payload(self, prompt: str, num_predict: int = 2000, stream: bool = False) -> Dict:
+        """Request body for Ollama's generate endpoint"""
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream,
+            "format": "json",
+            "keep_alive": settings.OLLAMA_KEEP_ALIVE,
+            "options": {
+                "temperature": 0.7,
+                "num_predict": num_predict,
+                "top_p": 0.9,
+                "repeat_penalty": 1.1
+            }
+        }
+    
+    def _check_ollama_status(self, response):
+        """Raise if Ollama answered with an error status"""
+        if response.status_code != 200:
+            response.read()  # streamed responses need their body loaded before .text
+            error_msg = f"Ollama API error: {response.status_code}"
+            if response.text:
+                error_msg += f" - {response.text}"
+            raise Exception(error_msg)
+    
+    def _read_ollama_stream(self, response) -> str:
+        """
+        Collect a streamed Ollama generation, closing the connection as soon
+        as the top-level JSON object is complete so trailing tokens aren't generated
+        """
+        try:
+            self._check_ollama_status(response)
             
-            if response.status_code == 200:
-                result = response.json()
-                graph_text = result.get('response', '{}')
+            parts = []
+            depth = 0
+            in_string = escaped = opened = False
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                token = chunk.get('response', '')
+                parts.append(token)
                 
-                if not graph_text or graph_text.strip() == '{}':
-                    raise Exception("Empty response from Ollama")
+                # Track object depth outside of string literals
+                for char in token:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif char == '\\':
+                            escaped = True
+                        elif char == '"':
+                            in_string = False
+                    elif char == '"':
+                        in_string = True
+                    elif char == '{':
+                        depth += 1
+                        opened = True
+                    elif char == '}':
+                        depth -= 1
                 
-                # Parse the JSON response with multiple fallback strategies
-                graph_data = self._parse_llm_response(graph_text)
-                return self._validate_and_format_graph(graph_data)
+                if (opened and depth <= 0) or chunk.get('done'):
+                    break
+        finally:
+            response.close()
+        
+        graph_text = ''.join(parts)
+        if not graph_text or graph_text.strip() == '{}':
+            raise Exception("Empty response from Ollama")
+        return graph_text
+    
+    def _read_ollama_response(self, response) -> str:
+        """Return the generated text from a non-streamed Ollama response, raising on errors"""
+        self._check_ollama_status(response)
+        
+        graph_text = response.json().get('response', '{}')
+        if not graph_text or graph_text.strip() == '{}':
+            raise Exception("Empty response from Ollama")
+        return graph_text
+    
+    async def _extract_with_ollama_async(self, text: str, client: httpx.AsyncClient) -> Dict:
+        """
+        Async counterpart of _extract_with_ollama using a shared httpx client
+        """
+        prompt = self._create_extraction_prompt(text)
+        try:
+            for timeout in _retry_timeouts(settings.OLLAMA_TIMEOUT):
+                try:
+                    response = await client.post(
+                        f"{self.ollama_url}/api/generate",
+                        json=self._ollama_payload(prompt),
+                        timeout=timeout
+                    )
+                    break
+                except httpx.TimeoutException:
+                    logger.warning(f"Ollama request timed out after {timeout}s")
             else:
-                error_msg = f"Ollama API error: {response.status_code}"
-                if response.text:
-                    error_msg += f" - {response.text}"
-                raise Exception(error_msg)
-                
-        except requests.exceptions.Timeout:
-            logger.error("Ollama request timeout")
-            raise Exception("Ollama timeout")
-        except requests.exceptions.ConnectionError:
+                logger.error("Ollama request timeout")
+                raise Exception("Ollama timeout")
+        except httpx.ConnectError:
             logger.error("Cannot connect to Ollama")
             raise Exception("Ollama connection error")
-        except Exception as e:
-            logger.error(f"Ollama extraction error: {e}")
-            raise
+        
+        graph_data = self._parse_llm_response(self._read_ollama_response(response))
+        return self._validate_and_format_graph(graph_data)
+    
+    def _extract_batch_with_ollama(self, texts: List[str]) -> List[Optional[Dict]]:
+        """
+        Extract graphs for several texts with a single Ollama request
+        
+        Returns one entry per text, None where the response has no usable result for it.
+        """
+        prompt = self._create_batch_extraction_prompt(texts)
+        graph_text = self._ollama_generate(prompt, num_predict=2000 * len(texts))
+        
+        data = self._parse_llm_response(graph_text)
+        items = data.get('results') if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            raise Exception("Batched Ollama response has no results list")
+        
+        graphs: List[Optional[Dict]] = [None] * len(texts)
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            index = item.get('index', position)
+            if isinstance(index, int) and 0 <= index < len(texts) and graphs[index] is None:
+                graphs[index] = self._validate_and_format_graph(item)
+        return graphs
     
     def _parse_llm_response(self, response_text: str) -> Dict:
         """
@@ -248,44 +866,33 @@ class KnowledgeGraphExtractor:
         
         # Strategy 1: Try to parse as JSON directly
         try:
-            return json.loads(response_text.strip())
-        except json.JSONDecodeError:
+            return orjson.loads(response_text.strip())
+        except orjson.JSONDecodeError:
             pass
         
         # Strategy 2: Extract JSON from markdown code blocks
-        json_patterns = [
-            r'```json\s*(\{[\s\S]*?\})\s*```',  # JSON in code block
-            r'```\s*(\{[\s\S]*?\})\s*```',  # Generic code block
-            r'`(\{[\s\S]*?\})`',  # Inline code
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, response_text, re.DOTALL)
+        for pattern in _CODE_BLOCK_JSON_RES:
+            matches = pattern.findall(response_text)
             for match in matches:
                 try:
-                    return json.loads(match.strip())
-                except json.JSONDecodeError:
+                    return orjson.loads(match.strip())
+                except orjson.JSONDecodeError:
                     continue
         
         # Strategy 3: Find JSON object boundaries
-        json_patterns = [
-            r'\{[\s\S]*\}',  # Simple object
-            r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}',  # Nested object
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, response_text, re.DOTALL)
+        for pattern in _BARE_JSON_RES:
+            matches = pattern.findall(response_text)
             for match in matches:
                 try:
-                    return json.loads(match.strip())
-                except json.JSONDecodeError:
+                    return orjson.loads(match.strip())
+                except orjson.JSONDecodeError:
                     continue
         
         # Strategy 4: Try to fix common JSON issues
         fixed_text = self._fix_common_json_issues(response_text)
         try:
-            return json.loads(fixed_text)
-        except json.JSONDecodeError:
+            return orjson.loads(fixed_text)
+        except orjson.JSONDecodeError:
             pass
         
         # If all strategies fail, raise an exception
@@ -312,67 +919,184 @@ class KnowledgeGraphExtractor:
             text = text[:end_idx + 1]
         
         # Fix common issues
-        text = re.sub(r',\s*}', '}', text)  # Remove trailing commas
-        text = re.sub(r',\s*]', ']', text)  # Remove trailing commas in arrays
-        text = re.sub(r'([{,]\s*)(\w+):', r'\1"\2":', text)  # Quote unquoted keys
-        text = re.sub(r':\s*([^",{\[\s][^,}]*?)(\s*[,}])', r': "\1"\2', text)  # Quote unquoted string values
+        for pattern, replacement in _JSON_REPAIRS:
+            text = pattern.sub(replacement, text)
         
         return text.strip()
     
     def _extract_with_openai(self, text: str) -> Dict:
         """
         Use OpenAI for extraction with improved error handling
+        
+        Output that can't be parsed or fails validation is sent back to the model
+        with the problem described, up to OPENAI_FEEDBACK_RETRIES times.
         """
-        from openai import OpenAI
+        from openai import OpenAI, APITimeoutError
         
         client = OpenAI(api_key=self.openai_key)
-        prompt = self._create_extraction_prompt(text)
+        messages = self._openai_messages(self._create_extraction_prompt(text))
         
         try:
-            response = client.chat.completions.create(
-                model=getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'),
-                messages=[
-                    {"role": "system", "content": "You are an expert at extracting entities and relationships from text. Always return valid JSON in the exact format specified."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.7,
-                max_tokens=2000
-            )
+            for attempt in range(OPENAI_FEEDBACK_RETRIES + 1):
+                for timeout in _retry_timeouts(settings.OPENAI_TIMEOUT):
+                    try:
+                        completions = client.with_options(timeout=timeout, max_retries=0).chat.completions
+                        create = completions.parse if settings.OPENAI_STRUCTURED_OUTPUT else completions.create
+                        response = create(**self._openai_request(messages))
+                        break
+                    except APITimeoutError:
+                        logger.warning(f"OpenAI request timed out after {timeout}s")
+                else:
+                    raise Exception("OpenAI timeout")
+                
+                result, problem = self._check_openai_response(response)
+                if problem is None or attempt == OPENAI_FEEDBACK_RETRIES:
+                    break
+                logger.warning(f"OpenAI output rejected ({problem}), asking for a corrected graph")
+                messages += self._openai_feedback_messages(response, problem)
+                time.sleep(attempt + 1)
             
-            graph_text = response.choices[0].message.content
-            if not graph_text:
-                raise Exception("Empty response from OpenAI")
+            if result is None:
+                raise Exception(problem)
+            return result
             
-            # Use the robust parsing method
-            graph_data = self._parse_llm_response(graph_text)
-            return self._validate_and_format_graph(graph_data)
+        except Exception as e:
+            logger.error(f"OpenAI extraction error: {e}")
+            raise
+    
+    async def _extract_with_openai_async(self, text: str, client) -> Dict:
+        """
+        Async counterpart of _extract_with_openai using a shared AsyncOpenAI client
+        """
+        from openai import APITimeoutError
+        
+        messages = self._openai_messages(self._create_extraction_prompt(text))
+        
+        try:
+            for attempt in range(OPENAI_FEEDBACK_RETRIES + 1):
+                for timeout in _retry_timeouts(settings.OPENAI_TIMEOUT):
+                    try:
+                        completions = client.with_options(timeout=timeout, max_retries=0).chat.completions
+                        create = completions.parse if settings.OPENAI_STRUCTURED_OUTPUT else completions.create
+                        response = await create(**self._openai_request(messages))
+                        break
+                    except APITimeoutError:
+                        logger.warning(f"OpenAI request timed out after {timeout}s")
+                else:
+                    raise Exception("OpenAI timeout")
+                
+                result, problem = self._check_openai_response(response)
+                if problem is None or attempt == OPENAI_FEEDBACK_RETRIES:
+                    break
+                logger.warning(f"OpenAI output rejected ({problem}), asking for a corrected graph")
+                messages += self._openai_feedback_messages(response, problem)
+                await asyncio.sleep(attempt + 1)
+            
+            if result is None:
+                raise Exception(problem)
+            return result
             
         except Exception as e:
             logger.error(f"OpenAI extraction error: {e}")
             raise
     
+    def _openai_messages(self, prompt: str) -> List[Dict]:
+        """Initial conversation for an extraction request"""
+        return [
+            {"role": "system", "content": "You are an expert at extracting entities and relationships from text. Always return valid JSON in the exact format specified."},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _openai_request(self, messages: List[Dict]) -> Dict:
+        """Keyword arguments for the chat completion call"""
+        return {
+            "model": getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo'),
+            "messages": messages,
+            # Structured outputs make the API enforce the graph schema itself
+            "response_format": ExtractedGraph if settings.OPENAI_STRUCTURED_OUTPUT else {"type": "json_object"},
+            "temperature": 0.7,
+            "max_tokens": 2000
+        }
+    
+    def _check_openai_response(self, response) -> tuple:
+        """
+        Return (graph, problem) for a chat completion; problem is None when the graph is usable
+        """
+        try:
+            result = self._read_openai_response(response)
+        except Exception as e:
+            return None, str(e)
+        if not self._validate_extraction_result(result):
+            return result, GRAPH_SHAPE_FEEDBACK
+        return result, None
+    
+    def _openai_feedback_messages(self, response, problem: str) -> List[Dict]:
+        """Follow-up turn asking the model to correct its previous output"""
+        return [
+            {"role": "assistant", "content": response.choices[0].message.content or ""},
+            {"role": "user", "content": f"Your output had an error: {problem}. Fix it and return ONLY the corrected JSON object."}
+        ]
+    
+    def _read_openai_response(self, response) -> Dict:
+        """Parse and format the graph from a chat completion"""
+        parsed = getattr(response.choices[0].message, 'parsed', None)
+        if parsed is not None:
+            # Already decoded and validated against ExtractedGraph; no repair needed
+            return self._validate_and_format_graph(parsed.model_dump())
+        
+        graph_text = response.choices[0].message.content
+        if not graph_text:
+            raise Exception("Empty response from OpenAI")
+        
+        # Use the robust parsing method
+        graph_data = self._parse_llm_response(graph_text)
+        return self._validate_and_format_graph(graph_data)
+    
+    def _truncate_for_prompt(self, text: str) -> str:
+        """
+        Clip text to LLM_MAX_INPUT_CHARS, backing off to the last whitespace in the
+        final tenth of the budget so the model never sees half a word
+        """
+        limit = settings.LLM_MAX_INPUT_CHARS
+        if len(text) <= limit:
+            return text
+        cut = max(text.rfind(' ', limit - limit // 10, limit + 1), text.rfind('\n', limit - limit // 10, limit + 1))
+        return text[:cut] if cut > 0 else text[:limit]
+    
     def _create_extraction_prompt(self, text: str) -> str:
         """
         Create prompt for LLM
         """
-        return f"""Extract entities and relationships from the following text and return ONLY a valid JSON object with this exact structure:
+        return "".join((_EXTRACTION_PROMPT_PREFIX, self._truncate_for_prompt(text), _EXTRACTION_PROMPT_SUFFIX))
+    
+    def _create_batch_extraction_prompt(self, texts: List[str]) -> str:
+        """
+        Create one prompt covering several numbered texts
+        """
+        sections = "\n\n".join(f"[{index}]\n{self._truncate_for_prompt(text)}" for index, text in enumerate(texts))
+        return f"""Extract entities and relationships from each of the {len(texts)} numbered texts below and return ONLY a valid JSON object with this exact structure, one entry per text:
 
 {{
-  "nodes": [
-    {{"id": "n1", "label": "Entity Name", "type": "Person"}},
-    {{"id": "n2", "label": "Another Entity", "type": "Organization"}}
-  ],
-  "edges": [
-    {{"source": "n1", "target": "n2", "relationship": "works_at"}}
+  "results": [
+    {{
+      "index": 0,
+      "nodes": [
+        {{"id": "n1", "label": "Entity Name", "type": "Person"}},
+        {{"id": "n2", "label": "Another Entity", "type": "Organization"}}
+      ],
+      "edges": [
+        {{"source": "n1", "target": "n2", "relationship": "works_at"}}
+      ]
+    }}
   ]
 }}
 
+Each entry's "index" is the number of the text it describes, and its node ids only need to be unique within that entry.
 Entity types can be: Person, Organization, Location, Concept, Event, Product, Technology, etc.
 Relationships should be concise verbs or phrases like: works_at, located_in, founded_by, created, manages, etc.
 
-Text to analyze:
-{text[:2000]}
+Texts to analyze:
+{sections}
 
 Return ONLY the JSON object, no other text."""
     
@@ -384,29 +1108,18 @@ Return ONLY the JSON object, no other text."""
         edges = []
         node_counter = 1
         
-        # Preprocess text to handle multi-sentence relationships better
-        # Split into sentences for better matching
-        sentences = re.split(r'[.!?]+', text)
-        
-        # Improved patterns for entities - multi-word proper nouns
-        capitalized_pattern = r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b'
-        capitalized_words = re.findall(capitalized_pattern, text)
-        
-        # Filter out common words that aren't entities
-        stop_words = {'In', 'The', 'A', 'An', 'This', 'That', 'These', 'Those', 'It', 'Is', 'Was', 'Are', 'Were', 'Be', 'Been'}
-        capitalized_words = [word for word in capitalized_words if word not in stop_words]
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_words = []
-        for word in capitalized_words:
-            if word not in seen:
-                seen.add(word)
-                unique_words.append(word)
-        
-        capitalized_words = unique_words[:15]  # Limit to 15 unique entities
+        # Multi-word proper nouns in order of first appearance, skipping stop words;
+        # scanning stops once the entity limit is reached
+        unique_words = {}
+        for match in _CAPITALIZED_RE.finditer(text):
+            word = match.group()
+            if word not in ENTITY_STOP_WORDS and word not in unique_words:
+                unique_words[word] = None
+                if len(unique_words) == MAX_RULE_ENTITIES:
+                    break
+        capitalized_words = list(unique_words)
         
-        node_map = {}
+        node_map = {}  # lowercased label -> node id
         for word in capitalized_words:
             node_id = f"n{node_counter}"
             node_type = self._guess_entity_type(word, text)
@@ -415,92 +1128,57 @@ Return ONLY the JSON object, no other text."""
                 "label": word,
                 "type": node_type
             })
-            node_map[word] = node_id
+            node_map.setdefault(word.lower(), node_id)
             node_counter += 1
         
-        # Improved relationship patterns - process each sentence
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if not sentence:
-                continue
-                
-            # Extract relationships from this sentence
-            self._extract_relationships_from_sentence(sentence, node_map, edges)
+        self._extract_relationships(text, node_map, edges)
         
         return {"nodes": nodes, "edges": edges}
     
-    def _extract_relationships_from_sentence(self, sentence: str, node_map: dict, edges: list):
-        """Extract relationships from a single sentence"""
+    def _extract_relationships(self, text: str, node_map: dict, edges: list):
+        """
+        Extract relationships with one scan of the whole text per pattern
         
-        print(f"Processing sentence for relationships: {sentence}")
-        relationship_patterns = [
-            # CEO/Leadership patterns
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+the\s+CEO\s+of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'ceo_of'),
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+the\s+CTO\s+of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'cto_of'),
-            
-            # Work relationships
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:works?|worked|working)\s+(?:as\s+a?\s+)?(?:\w+\s+)?(?:at|for|in|with)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'works_at'),
-            
-            # Founding/Creation with location
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+founded\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+in\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'founded'),
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:founded|established|created|started)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'founded'),
-            
-            # Location - with "in" pattern
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+in\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+in\s+\d{4}', 'located_in'),
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*),?\s+(?:headquartered|located|based)\s+in\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'located_in'),
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+located\s+in\s+(?:the\s+)?(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'located_in'),
-            
-            # Acquisition with details
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+acquired\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:for|in)', 'acquired'),
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:acquired|bought|purchased)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'acquired'),
-            
-            # Management
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:manages|managed|leads|led|oversees)\s+(?:the\s+)?(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'manages'),
-            
-            # Role/Position
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+serves\s+as\s+(?:\w+\s+)?of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'member_of'),
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+now\s+serves\s+as\s+\w+\s+of\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'member_of'),
-            
-            # Development
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+developed\s+(?:an?\s+)?(?:\w+\s+)?(?:platform\s+)?called\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'developed'),
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+(?:developed|built|designed|created)\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'developed'),
-            
-            # Usage
-            (r'(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s+is\s+used\s+by\s+(\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', 'used_by'),
-        ]
+        No pattern can match across sentence punctuation, so matches are the same
+        as scanning sentence by sentence; they are replayed in sentence order, then
+        pattern order, then position, which keeps the resulting edges in that order.
+        """
+        sentence_ends = [match.end() for match in _SENTENCE_END_RE.finditer(text)]
+        folded = text.casefold()
         
-        for pattern, rel_type in relationship_patterns:
-            matches = re.findall(pattern, sentence, re.IGNORECASE)
-            for match in matches:
-                if isinstance(match, tuple):
-                    # Handle patterns with 2 or 3 groups
-                    if len(match) == 3:
-                        # Pattern like "X founded Y in Z" - create two relationships
-                        source, target, location = match
-                        self._add_edge_if_valid(source, target, rel_type, node_map, edges)
-                        self._add_edge_if_valid(target, location, 'located_in', node_map, edges)
-                    else:
-                        source, target = match
-                        self._add_edge_if_valid(source, target, rel_type, node_map, edges)
-    
-    def _add_edge_if_valid(self, source: str, target: str, rel_type: str, node_map: dict, edges: list):
+        found = []
+        for pattern_index, (pattern, rel_type, keywords) in enumerate(_RELATIONSHIP_RES):
+            if keywords and not any(keyword in folded for keyword in keywords):
+                continue
+            for match in pattern.finditer(text):
+                sentence_index = bisect.bisect_right(sentence_ends, match.start())
+                found.append((sentence_index, pattern_index, match.start(), match.groups(), rel_type))
+        found.sort(key=lambda item: item[:3])
+        
+        edge_keys = set()
+        for _, _, _, groups, rel_type in found:
+            if len(groups) == 3:
+                # Pattern like "X founded Y in Z" - create two relationships
+                source, target, location = groups
+                self._add_edge_if_valid(source, target, rel_type, node_map, edges, edge_keys)
+                self._add_edge_if_valid(target, location, 'located_in', node_map, edges, edge_keys)
+            else:
+                source, target = groups
+                self._add_edge_if_valid(source, target, rel_type, node_map, edges, edge_keys)
+    
+    def _add_edge_if_valid(self, source: str, target: str, rel_type: str, node_map: dict, edges: list, edge_keys: set):
         """Add an edge if both nodes exist and edge doesn't already exist"""
-        # Find the exact case version from node_map
-        source_key = next((k for k in node_map.keys() if k.lower() == source.lower()), None)
-        target_key = next((k for k in node_map.keys() if k.lower() == target.lower()), None)
-        
-        if source_key and target_key and source_key != target_key:
-            # Avoid duplicate edges
-            edge_exists = any(
-                e['source'] == node_map[source_key] and 
-                e['target'] == node_map[target_key] and 
-                e['relationship'] == rel_type 
-                for e in edges
-            )
-            if not edge_exists:
+        # node_map is keyed by lowercased label, edge_keys mirrors the edges added so far
+        source_id = node_map.get(source.lower())
+        target_id = node_map.get(target.lower())
+        
+        if source_id and target_id and source_id != target_id:
+            key = (source_id, target_id, rel_type)
+            if key not in edge_keys:
+                edge_keys.add(key)
                 edges.append({
-                    "source": node_map[source_key],
-                    "target": node_map[target_key],
+                    "source": source_id,
+                    "target": target_id,
                     "relationship": rel_type
                 })
     
@@ -511,36 +1189,34 @@ Return ONLY the JSON object, no other text."""
         entity_lower = entity.lower()
         
         # Check for organization indicators
-        org_keywords = ['corporation', 'corp', 'company', 'inc', 'ltd', 'llc', 'university', 'institute', 'department', 'division']
-        if any(keyword in entity_lower for keyword in org_keywords):
+        if any(keyword in entity_lower for keyword in ORG_KEYWORDS):
             return "Organization"
         
         # Check for location indicators
-        location_keywords = ['city', 'country', 'state', 'street', 'avenue', 'road', 'york', 'francisco', 'london', 'paris', 'tokyo']
-        if any(keyword in entity_lower for keyword in location_keywords):
+        if any(keyword in entity_lower for keyword in LOCATION_KEYWORDS):
             return "Location"
         
         # Check for technology/product indicators
-        tech_keywords = ['bot', 'app', 'system', 'platform', 'software', 'tool', 'ai', 'tech']
-        if any(keyword in entity_lower for keyword in tech_keywords):
+        if any(keyword in entity_lower for keyword in TECH_KEYWORDS):
             return "Technology"
         
         # Check for job titles (likely part of person's description)
-        title_keywords = ['engineer', 'manager', 'director', 'ceo', 'cto', 'cfo', 'president', 'vice president']
-        if any(keyword in entity_lower for keyword in title_keywords):
+        if any(keyword in entity_lower for keyword in TITLE_KEYWORDS):
             return "JobTitle"
         
-        # Check context for person indicators
-        person_context_patterns = [
-            rf'{re.escape(entity)}\s+(?:is|was|works|worked|manages|founded)',
-            rf'(?:Mr\.|Mrs\.|Dr\.|Ms\.)\s+{re.escape(entity)}',
-            rf'{re.escape(entity)}\s+(?:serves as|joined|left)'
-        ]
-        if any(re.search(pattern, context, re.IGNORECASE) for pattern in person_context_patterns):
+        # Check if it looks like a person name (two capitalized words); this gives
+        # the same answer as the context scan below, so it goes first and saves it
+        words = entity.split()
+        if len(words) == 2 and all(word[0].isupper() for word in words):
             return "Person"
         
-        # Check if it looks like a person name (two capitalized words)
-        if len(entity.split()) == 2 and all(word[0].isupper() for word in entity.split()):
+        # Check context for person indicators (one scan covering all person cues)
+        escaped = re.escape(entity)
+        person_pattern = (
+            rf'{escaped}\s+(?:is|was|works|worked|manages|founded|serves as|joined|left)'
+            rf'|(?:Mr\.|Mrs\.|Dr\.|Ms\.)\s+{escaped}'
+        )
+        if re.search(person_pattern, context, re.IGNORECASE):
             return "Person"
         
         # Default to Entity for ambiguous cases
@@ -553,25 +1229,31 @@ Return ONLY the JSON object, no other text."""
         nodes = graph_data.get('nodes', [])
         edges = graph_data.get('edges', [])
         
-        # Ensure all nodes have required fields
+        # Ensure all nodes have required fields; a repeated id keeps its first node
         formatted_nodes = []
+        node_ids = set()
         for node in nodes:
-            if 'id' in node and 'label' in node:
+            if 'id' in node and 'label' in node and node['id'] not in node_ids:
+                node_ids.add(node['id'])
                 formatted_nodes.append({
                     'id': node['id'],
                     'label': node['label'],
                     'type': node.get('type', 'Entity')
                 })
         
-        # Ensure all edges have required fields
+        # Ensure all edges have required fields, dropping repeated relations
         formatted_edges = []
-        node_ids = {node['id'] for node in formatted_nodes}
+        edge_keys = set()
         for edge in edges:
             if 'source' in edge and 'target' in edge and edge['source'] in node_ids and edge['target'] in node_ids:
+                key = (edge['source'], edge['target'], edge.get('relationship', 'related_to'))
+                if key in edge_keys:
+                    continue
+                edge_keys.add(key)
                 formatted_edges.append({
-                    'source': edge['source'],
-                    'target': edge['target'],
-                    'relationship': edge.get('relationship', 'related_to')
+                    'source': key[0],
+                    'target': key[1],
+                    'relationship': key[2]
                 })
         
         return {
@@ -584,12 +1266,12 @@ Return ONLY the JSON object, no other text."""
         Try to extract JSON from text response
         """
         # Look for JSON object in the text
-        json_match = re.search(r'\{.*\}', text, re.DOTALL)
+        json_match = _BARE_JSON_RES[0].search(text)
         if json_match:
             try:
-                graph_data = json.loads(json_match.group())
+                graph_data = orjson.loads(json_match.group())
                 return self._validate_and_format_graph(graph_data)
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 pass
         
         # If all else fails, return empty graph
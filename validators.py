@@ -3,14 +3,27 @@ Input validation module for AI-Powered Knowledge Graph Builder
 Provides comprehensive validation for file uploads, data integrity, and API inputs.
 """
 
+import hashlib
 import os
 import re
-import json
-from typing import List, Dict, Any, Optional, Tuple
+import sys
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Collection
 from pathlib import Path
 from fastapi import HTTPException
+import orjson
 from config import settings
 
+# Resolved once; every path check compares against it
+_UPLOAD_DIR_RESOLVED = Path(settings.UPLOAD_DIR).resolve()
+
+# Successfully validated LLM responses remembered by validate_knowledge_graph_response,
+# keyed by a digest of the response text so the text itself isn't retained
+GRAPH_VALIDATION_CACHE_SIZE = 256
+_graph_validation_cache: "OrderedDict[bytes, bytes]" = OrderedDict()
+_graph_validation_cache_lock = threading.Lock()
+
 
 class ValidationError(Exception):
     """Custom exception for validation errors"""
@@ -26,26 +39,16 @@ class FileValidator:
     # Maximum filename length
     MAX_FILENAME_LENGTH = 255
     
-    # Dangerous filename patterns (path traversal, etc.)
-    DANGEROUS_PATTERNS = [
-        r'\.\./',  # Path traversal
-        r'\.\.\\',  # Windows path traversal
-        r'/',  # Directory separators
-        r'\\',  # Windows directory separators
-        r'<',  # HTML/XML injection
-        r'>',  # HTML/XML injection
-        r'|',  # Command injection
-        r'&',  # Command injection
-        r';',  # Command injection
-        r'`',  # Command injection
-        r'$',  # Variable substitution
-        r'*',  # Wildcard
-        r'?',  # Wildcard
-        r'[',  # Character class
-        r']',  # Character class
-        r'{',  # Brace expansion
-        r'}',  # Brace expansion
-    ]
+    # Dangerous filename characters: directory separators (which also cover ../ and
+    # ..\ traversal), HTML/XML and command injection, variable substitution, wildcards,
+    # character classes and brace expansion
+    DANGEROUS_CHARACTERS = frozenset('/\\<>|&;`$*?[]{}')
+    
+    # The same set as escaped regex patterns, kept for callers of the old pattern list
+    DANGEROUS_PATTERNS = [re.escape(char) for char in sorted(DANGEROUS_CHARACTERS)]
+    
+    # Characters replaced during sanitizing
+    _UNSAFE_CHARS_RE = re.compile(r'[^\w\-_\.]')
     
     @classmethod
     def validate_filename(cls, filename: str) -> str:
@@ -67,13 +70,12 @@ class FileValidator:
         if len(filename) > cls.MAX_FILENAME_LENGTH:
             raise ValidationError(f"Filename too long. Maximum length: {cls.MAX_FILENAME_LENGTH}")
         
-        # Check for dangerous patterns
-        for pattern in cls.DANGEROUS_PATTERNS:
-            if re.search(pattern, filename):
-                raise ValidationError(f"Filename contains dangerous characters: {filename}")
+        # Check for dangerous characters
+        if not cls.DANGEROUS_CHARACTERS.isdisjoint(filename):
+            raise ValidationError(f"Filename contains dangerous characters: {filename}")
         
         # Remove any remaining dangerous characters
-        safe_filename = re.sub(r'[^\w\-_\.]', '_', filename)
+        safe_filename = cls._UNSAFE_CHARS_RE.sub('_', filename)
         
         if not safe_filename:
             raise ValidationError("Filename contains no valid characters")
@@ -150,21 +152,28 @@ class FileValidator:
         # Resolve the path to prevent directory traversal
         try:
             resolved_path = Path(file_path).resolve()
-            upload_dir = Path(settings.UPLOAD_DIR).resolve()
-            
-            # Ensure the file is within the upload directory
-            if not str(resolved_path).startswith(str(upload_dir)):
-                raise ValidationError("File path is outside allowed directory")
-            
-        except Exception as e:
+        except (OSError, RuntimeError, ValueError) as e:
             raise ValidationError(f"Invalid file path: {e}")
         
+        # Component-wise check, so "/uploads_evil" doesn't pass for "/uploads"
+        if not resolved_path.is_relative_to(_UPLOAD_DIR_RESOLVED):
+            raise ValidationError("File path is outside allowed directory")
+        
         return str(resolved_path)
 
 
 class DataValidator:
     """Validates data structures and content"""
     
+    # JSON in fenced code blocks (optionally tagged json) within LLM output
+    _JSON_CODE_BLOCK_RE = re.compile(r'```(?:json)?\s*(\{[\s\S]*?\})\s*```')
+    
+    # Required fields, in the order missing ones are reported
+    NODE_FIELDS = ('id', 'label', 'type')
+    EDGE_FIELDS = ('source', 'target', 'relationship')
+    _NODE_FIELD_SET = frozenset(NODE_FIELDS)
+    _EDGE_FIELD_SET = frozenset(EDGE_FIELDS)
+    
     @classmethod
     def validate_knowledge_graph(cls, graph_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -187,15 +196,14 @@ class DataValidator:
         if not isinstance(nodes, list):
             raise ValidationError("Nodes must be a list")
         
-        validated_nodes = []
-        node_ids = set()
+        # Ordered by insertion, so this doubles as the validated node list
+        nodes_by_id: Dict[str, Dict[str, Any]] = {}
         
         for i, node in enumerate(nodes):
             validated_node = cls._validate_node(node, i)
-            if validated_node['id'] in node_ids:
+            if validated_node['id'] in nodes_by_id:
                 raise ValidationError(f"Duplicate node ID: {validated_node['id']}")
-            node_ids.add(validated_node['id'])
-            validated_nodes.append(validated_node)
+            nodes_by_id[validated_node['id']] = validated_node
         
         # Validate edges
         edges = graph_data.get('edges', [])
@@ -203,18 +211,19 @@ class DataValidator:
             raise ValidationError("Edges must be a list")
         
         validated_edges = []
-        edge_pairs = set()
+        # Edge triple -> index of its first occurrence; tuples don't cache their hash,
+        # so setdefault tests and records each triple with a single hash
+        edge_first_index: Dict[Tuple[str, str, str], int] = {}
         
         for i, edge in enumerate(edges):
-            validated_edge = cls._validate_edge(edge, i, node_ids)
+            validated_edge = cls._validate_edge(edge, i, nodes_by_id.keys())
             edge_key = (validated_edge['source'], validated_edge['target'], validated_edge['relationship'])
-            if edge_key in edge_pairs:
+            if edge_first_index.setdefault(edge_key, i) != i:
                 raise ValidationError(f"Duplicate edge: {edge_key}")
-            edge_pairs.add(edge_key)
             validated_edges.append(validated_edge)
         
         return {
-            'nodes': validated_nodes,
+            'nodes': list(nodes_by_id.values()),
             'edges': validated_edges
         }
     
@@ -224,11 +233,10 @@ class DataValidator:
         if not isinstance(node, dict):
             raise ValidationError(f"Node {index} must be a dictionary")
         
-        # Required fields
-        required_fields = ['id', 'label', 'type']
-        for field in required_fields:
-            if field not in node:
-                raise ValidationError(f"Node {index} missing required field: {field}")
+        # Required fields; one subset check covers the common all-present case
+        if not node.keys() >= cls._NODE_FIELD_SET:
+            field = next(f for f in cls.NODE_FIELDS if f not in node)
+            raise ValidationError(f"Node {index} missing required field: {field}")
         
         # Validate node ID
         node_id = str(node['id']).strip()
@@ -251,23 +259,23 @@ class DataValidator:
         if len(node_type) > 100:
             raise ValidationError(f"Node {index} type too long (max 100 characters)")
         
+        # Types repeat a small vocabulary across a graph, so share one copy of each
         return {
             'id': node_id,
             'label': label,
-            'type': node_type
+            'type': sys.intern(node_type)
         }
     
     @classmethod
-    def _validate_edge(cls, edge: Dict[str, Any], index: int, valid_node_ids: set) -> Dict[str, Any]:
+    def _validate_edge(cls, edge: Dict[str, Any], index: int, valid_node_ids: Collection[str]) -> Dict[str, Any]:
         """Validate a single edge"""
         if not isinstance(edge, dict):
             raise ValidationError(f"Edge {index} must be a dictionary")
         
-        # Required fields
-        required_fields = ['source', 'target', 'relationship']
-        for field in required_fields:
-            if field not in edge:
-                raise ValidationError(f"Edge {index} missing required field: {field}")
+        # Required fields; one subset check covers the common all-present case
+        if not edge.keys() >= cls._EDGE_FIELD_SET:
+            field = next(f for f in cls.EDGE_FIELDS if f not in edge)
+            raise ValidationError(f"Edge {index} missing required field: {field}")
         
         # Validate source and target
         source = str(edge['source']).strip()
@@ -296,9 +304,40 @@ class DataValidator:
         return {
             'source': source,
             'target': target,
-            'relationship': relationship
+            'relationship': sys.intern(relationship)
         }
     
+    @staticmethod
+    def _iter_json_candidates(text: str):
+        """
+        Yield balanced top-level {...} substrings in one linear pass
+        
+        Braces inside JSON string literals are ignored, so a candidate ends at the
+        brace that actually closes the object.
+        """
+        depth = 0
+        start = 0
+        in_string = escaped = False
+        for i, char in enumerate(text):
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == '\\':
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '{':
+                if depth == 0:
+                    start = i
+                depth += 1
+            elif depth:
+                if char == '"':
+                    in_string = True
+                elif char == '}':
+                    depth -= 1
+                    if depth == 0:
+                        yield text[start:i + 1]
+    
     @classmethod
     def validate_json_response(cls, response_text: str) -> Dict[str, Any]:
         """
@@ -318,25 +357,23 @@ class DataValidator:
         
         # Try to parse as JSON directly
         try:
-            return json.loads(response_text.strip())
-        except json.JSONDecodeError:
+            return orjson.loads(response_text.strip())
+        except orjson.JSONDecodeError:
             pass
         
-        # Try to extract JSON from text using regex
-        json_patterns = [
-            r'\{.*\}',  # Simple object
-            r'\{[\s\S]*\}',  # Object with newlines
-            r'```json\s*(\{[\s\S]*?\})\s*```',  # JSON in code block
-            r'```\s*(\{[\s\S]*?\})\s*```',  # JSON in generic code block
-        ]
-        
-        for pattern in json_patterns:
-            matches = re.findall(pattern, response_text, re.DOTALL)
-            for match in matches:
-                try:
-                    return json.loads(match.strip())
-                except json.JSONDecodeError:
-                    continue
+        # Try JSON inside code blocks
+        for match in cls._JSON_CODE_BLOCK_RE.finditer(response_text):
+            try:
+                return orjson.loads(match.group(1).strip())
+            except orjson.JSONDecodeError:
+                continue
+        
+        # Fall back to each balanced top-level {...} in the text
+        for candidate in cls._iter_json_candidates(response_text):
+            try:
+                return orjson.loads(candidate)
+            except orjson.JSONDecodeError:
+                continue
         
         raise ValidationError("Could not extract valid JSON from LLM response")
 
@@ -358,6 +395,12 @@ class APIValidator:
         Raises:
             ValidationError: If document ID is invalid
         """
+        # FastAPI has usually parsed path parameters already; skip the conversion
+        if type(document_id) is int:
+            if document_id <= 0:
+                raise ValidationError("Document ID must be a positive integer")
+            return document_id
+        
         try:
             doc_id = int(document_id)
             if doc_id <= 0:
@@ -380,6 +423,12 @@ class APIValidator:
         Raises:
             ValidationError: If version number is invalid
         """
+        # FastAPI has usually parsed path parameters already; skip the conversion
+        if type(version_number) is int:
+            if version_number <= 0:
+                raise ValidationError("Version number must be a positive integer")
+            return version_number
+        
         try:
             version = int(version_number)
             if version <= 0:
@@ -402,14 +451,15 @@ class APIValidator:
         Raises:
             ValidationError: If text content is invalid
         """
-        if not text or not text.strip():
+        stripped = text.strip() if text else ''
+        if not stripped:
             raise ValidationError("Text content cannot be empty")
         
         # Check for reasonable length
         if len(text) > 1000000:  # 1MB of text
             raise ValidationError("Text content too long (maximum 1MB)")
         
-        return text.strip()
+        return stripped
 
 
 def validate_file_upload(file, filename: str) -> Tuple[str, str]:
@@ -433,10 +483,12 @@ def validate_file_upload(file, filename: str) -> Tuple[str, str]:
         # Validate file extension
         file_ext = FileValidator.validate_file_extension(safe_filename)
         
-        # Validate file size
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset to beginning
+        # Validate file size; the multipart parser records it as the upload is spooled
+        file_size = getattr(file, 'size', None)
+        if file_size is None:
+            file.file.seek(0, 2)  # Seek to end
+            file_size = file.file.tell()
+            file.file.seek(0)  # Reset to beginning
         FileValidator.validate_file_size(file_size)
         
         return safe_filename, file_ext
@@ -447,12 +499,14 @@ def validate_file_upload(file, filename: str) -> Tuple[str, str]:
         raise HTTPException(status_code=400, detail=f"File validation error: {str(e)}")
 
 
-def validate_knowledge_graph_response(response_text: str) -> Dict[str, Any]:
+def validate_knowledge_graph_response(response_text: str, use_cache: bool = True) -> Dict[str, Any]:
     """
     Validate knowledge graph response from LLM
     
     Args:
         response_text: Raw response from LLM
+        use_cache: Look up and remember the result; pass False for one-off inputs
+            such as merged graphs, which would only take up cache space
         
     Returns:
         Validated knowledge graph data
@@ -461,15 +515,32 @@ def validate_knowledge_graph_response(response_text: str) -> Dict[str, Any]:
         HTTPException: If validation fails
     """
     try:
-        # Parse JSON
-        graph_data = DataValidator.validate_json_response(response_text)
-        
-        # Validate structure
-        validated_graph = DataValidator.validate_knowledge_graph(graph_data)
-        
-        return validated_graph
+        if not use_cache:
+            return DataValidator.validate_knowledge_graph(DataValidator.validate_json_response(response_text))
+        # Each hit gets its own copy, so callers may mutate the result freely
+        return orjson.loads(_validate_knowledge_graph_cached(response_text))
         
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=f"Graph validation error: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Graph parsing error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=422, detail=f"Graph parsing error: {str(e)}")
+
+
+def _validate_knowledge_graph_cached(response_text: str) -> bytes:
+    """Parse and validate a response, serialized; failures raise and are not cached"""
+    key = hashlib.blake2b(response_text.encode()).digest()
+    with _graph_validation_cache_lock:
+        cached = _graph_validation_cache.get(key)
+        if cached is not None:
+            _graph_validation_cache.move_to_end(key)
+            return cached
+    
+    graph_data = DataValidator.validate_json_response(response_text)
+    validated = orjson.dumps(DataValidator.validate_knowledge_graph(graph_data))
+    
+    with _graph_validation_cache_lock:
+        _graph_validation_cache[key] = validated
+        _graph_validation_cache.move_to_end(key)
+        while len(_graph_validation_cache) > GRAPH_VALIDATION_CACHE_SIZE:
+            _graph_validation_cache.popitem(last=False)
+    return validated